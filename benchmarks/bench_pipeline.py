@@ -0,0 +1,117 @@
+"""Benchmark: indicadores → señales → backtest → /signals, con tiempos, pico de memoria y baseline.
+
+    python benchmarks/bench_pipeline.py                       # 10k, 100k y 1M barras
+    python benchmarks/bench_pipeline.py --sizes 10000 --baseline benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --save-baseline       # sobrescribe el baseline
+
+Sale con código 1 si alguna etapa es más lenta que el baseline por encima de --threshold
+o usa más memoria pico por encima de --mem-threshold (por defecto el mismo umbral).
+Los tiempos dependen de la máquina: el baseline debe regenerarse en la que se compare.
+"""
+# --- Bootstrap ---
+import os, sys
+_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, os.path.normpath(_SRC))
+# ---------------
+
+import copy
+import json
+import platform
+import time
+import tracemalloc
+from fastapi.testclient import TestClient
+from mvpfx import api
+from mvpfx.config import get_cfg
+from mvpfx.data import simulate_ohlcv
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.strategy import generate_signals
+from mvpfx.backtest import backtest_signals
+from mvpfx.features import compute_features
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def measure(fn, repeat: int) -> dict:
+    """Mejor tiempo de `repeat` ejecuciones + pico de memoria (tracemalloc, en una pasada aparte)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 2**20}
+
+def run(sizes: list[int], cfg: dict) -> dict:
+    cfg = copy.deepcopy(cfg)
+    # Sin caché de respuestas: cada petición recorre el pipeline completo
+    api.cfg["api"]["signals_cache"] = False
+    client = TestClient(api.app)
+    results = {}
+    for bars in sizes:
+        repeat = 3 if bars <= 100_000 else 1
+        raw = simulate_ohlcv(bars, cfg["timeframe"], cfg["data"]["seed"])
+        feats = compute_all_indicators(raw, cfg)
+        sigs = generate_signals(feats, cfg)
+        frame = sigs.iloc[cfg["warmup_bars"]:]
+        api._fetch_bars = lambda symbol, timeframe, n: raw
+        stages = {
+            "indicators": lambda: compute_all_indicators(raw, cfg),
+            "signals": lambda: generate_signals(feats, cfg),
+            "backtest": lambda: backtest_signals(frame, cfg),
+            "features_compact": lambda: compute_features(raw, cfg, "float32"),
+            "api_signals": lambda: client.get("/signals").raise_for_status(),
+        }
+        results[str(bars)] = {name: measure(fn, repeat) for name, fn in stages.items()}
+        print(f"{bars:>8} barras: " + "  ".join(f"{k}={v['seconds']*1e3:.1f} ms/{v['peak_mb']:.0f} MB"
+                                                for k, v in results[str(bars)].items()))
+    return results
+
+MEM_SLACK_MB = 1.0  # por debajo de esta diferencia absoluta el pico de memoria se considera ruido
+
+def compare(current: dict, baseline: dict, threshold: float, mem_threshold: float | None = None) -> list[str]:
+    """
+    Etapas con tiempo > baseline * (1 + threshold) o pico de memoria > baseline * (1 + mem_threshold)
+    (y más de MEM_SLACK_MB por encima). Una etapa medida sin entrada en el baseline de su tamaño
+    también cuenta (hay que regenerarlo); los tamaños que el baseline no tiene solo se avisan.
+    """
+    mem_threshold = threshold if mem_threshold is None else mem_threshold
+    regressions = []
+    for bars, stages in current.items():
+        if bars not in baseline:
+            print(f"AVISO: {bars} barras no está en el baseline, no se compara")
+            continue
+        for name, m in stages.items():
+            ref = baseline[bars].get(name)
+            if not ref:
+                regressions.append(f"{name}@{bars}: sin entrada en el baseline (regenerar con --save-baseline)")
+                continue
+            if m["seconds"] > ref["seconds"] * (1 + threshold):
+                regressions.append(f"{name}@{bars}: {m['seconds']*1e3:.1f} ms vs {ref['seconds']*1e3:.1f} ms "
+                                   f"(+{m['seconds']/ref['seconds']-1:.0%})")
+            mb, ref_mb = m.get("peak_mb"), ref.get("peak_mb")
+            if mb is not None and ref_mb is not None and mb > ref_mb * (1 + mem_threshold) and mb - ref_mb > MEM_SLACK_MB:
+                regressions.append(f"{name}@{bars}: pico {mb:.1f} MB vs {ref_mb:.1f} MB "
+                                   f"(+{mb/ref_mb-1 if ref_mb else float('inf'):.0%})")
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Benchmark del pipeline indicadores → señales → backtest → API")
+    p.add_argument("--sizes", default="10000,100000,1000000", help="Tamaños en barras, separados por comas")
+    p.add_argument("--out", default="bench_results.json", help="JSON de resultados")
+    p.add_argument("--baseline", default=BASELINE, help="JSON de referencia")
+    p.add_argument("--threshold", type=float, default=0.25, help="Regresión de tiempo tolerada (0.25 = +25%%)")
+    p.add_argument("--mem-threshold", type=float, help="Regresión de memoria pico tolerada (por defecto --threshold)")
+    p.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como baseline")
+    args = p.parse_args()
+    results = run([int(s) for s in args.sizes.split(",")], get_cfg())
+    doc = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    with open(args.save_baseline and args.baseline or args.out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold, args.mem_threshold)
+        for r in regressions:
+            print("REGRESIÓN", r)
+        sys.exit(1 if regressions else 0)
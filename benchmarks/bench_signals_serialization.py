@@ -0,0 +1,35 @@
+"""Benchmark: serialización de /signals (Pydantic por fila vs. columnas NumPy)."""
+# --- Bootstrap ---
+import os, sys
+_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, os.path.normpath(_SRC))
+# ---------------
+
+import timeit
+from pydantic import TypeAdapter
+from mvpfx.api import Signal, encode_signals
+from mvpfx.config import get_cfg
+from mvpfx.data import simulate_ohlcv
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.strategy import generate_signals
+
+def pydantic_rows(df) -> bytes:
+    # Ruta anterior: iterrows + Signal(...) por fila + serialización de FastAPI
+    out = [Signal(timestamp=ts.isoformat(), open=float(r["open"]), high=float(r["high"]), low=float(r["low"]),
+                  close=float(r["close"]), price=float(r["close"]), signal=int(r["signal"]), score=float(r["score"]),
+                  sl=float(r["sl"]) if r["signal"] != 0 else None, tp=float(r["tp"]) if r["signal"] != 0 else None)
+           for ts, r in df.iterrows()]
+    return TypeAdapter(list[Signal]).dump_json(out)
+
+if __name__ == "__main__":
+    cfg = get_cfg()
+    for bars in (200, 2000, 20000):
+        df = generate_signals(compute_all_indicators(simulate_ohlcv(bars, "M5", 1), cfg), cfg)
+        n = max(3, 2000 // bars)
+        res = {name: min(timeit.repeat(fn, number=n, repeat=3)) / n * 1e3
+               for name, fn in (("pydantic_rows", lambda: pydantic_rows(df)),
+                                ("fast_rows", lambda: encode_signals(df, "rows")),
+                                ("columnar", lambda: encode_signals(df, "columnar")))}
+        base = res["pydantic_rows"]
+        print(f"{bars:>6} barras: " + "  ".join(f"{k}={v:.2f} ms (x{base/v:.0f})" for k, v in res.items()))
@@ -1,16 +1,18 @@
 """Script para generar reporte detallado de todas las señales con explicaciones IA"""
 import json
+import time
 from datetime import datetime
 from mvpfx.config import get_cfg
-from mvpfx.data import fetch_yfinance
+from mvpfx.data import fetch_yfinance, fetch_yfinance_cached
 from mvpfx.indicators import compute_all_indicators
 from mvpfx.strategy import generate_signals
-from mvpfx.llm_stub import explain_trade
+from mvpfx.llm_stub import explain_trades
 
 cfg = get_cfg()
 
 print("🔄 Descargando datos...")
-df = fetch_yfinance(cfg["symbol"], cfg["timeframe"], cfg["warmup_bars"] + 200)
+fetch = fetch_yfinance_cached if cfg["data"].get("cache", False) else fetch_yfinance
+df = fetch(cfg["symbol"], cfg["timeframe"], cfg["warmup_bars"] + 200)
 print(f"✅ {len(df)} barras descargadas")
 
 print("\n🔄 Calculando indicadores...")
@@ -31,12 +33,43 @@ print(f"\n✅ {total_signals} señales encontradas")
 print(f"   🔹 LONG: {(signals_df['signal'] == 1).sum()}")
 print(f"   🔻 SHORT: {(signals_df['signal'] == -1).sum()}")
 
-# Generar explicaciones para cada señal
+# Generar explicaciones para cada señal (en paralelo, con concurrencia acotada)
 print("\n🤖 Generando explicaciones con IA (Gemini)...")
 print("=" * 80)
 
+def indicadores(row):
+    return {
+        "ema_fast": float(row['ema_fast']),
+        "ema_slow": float(row['ema_slow']),
+        "rsi": float(row['rsi']),
+        "macd": float(row['macd']),
+        "atr": float(row['atr'])
+    }
+
+rows = list(signals_df.iterrows())
+items = [{
+    "strategy": "EMA Cross (Ultra-Rápido 3/8)",
+    "signal": "long" if row['signal'] == 1 else "short",
+    "indicators": indicadores(row),
+    "risk": {
+        "risk_pct": cfg["risk"]["risk_per_trade"],
+        "sl_atr_mult": cfg["risk"]["atr_sl_mult"],
+        "tp_atr_mult": cfg["risk"]["atr_tp_mult"]
+    },
+    "confidence": 0.75
+} for _, row in rows]
+llm_cfg = cfg.get("llm", {})
+t0 = time.perf_counter()
+try:
+    results = explain_trades(items, max_concurrency=llm_cfg.get("max_concurrency", 4),
+                             timeout=llm_cfg.get("timeout", 30.0), retries=llm_cfg.get("retries", 2))
+except Exception as e:
+    print(f"⚠️ Error generando explicaciones: {e}")
+    results = [None] * len(items)
+print(f"⏱️ {len(items)} explicaciones en {time.perf_counter() - t0:.1f}s")
+
 report = []
-for i, (timestamp, row) in enumerate(signals_df.iterrows(), 1):
+for i, ((timestamp, row), result) in enumerate(zip(rows, results), 1):
     signal_type = "LONG" if row['signal'] == 1 else "SHORT"
     action = "COMPRA" if row['signal'] == 1 else "VENTA"
     
@@ -44,61 +77,19 @@ for i, (timestamp, row) in enumerate(signals_df.iterrows(), 1):
     print(f"Precio: ${row['close']:.2f}")
     print(f"RSI: {row['rsi']:.2f} | MACD: {row['macd']:.4f} | ATR: {row['atr']:.4f}")
     
-    # Generar explicación IA
-    try:
-        explanation_result = explain_trade(
-            strategy="EMA Cross (Ultra-Rápido 3/8)",
-            signal="long" if row['signal'] == 1 else "short",
-            indicators={
-                "ema_fast": float(row['ema_fast']),
-                "ema_slow": float(row['ema_slow']),
-                "rsi": float(row['rsi']),
-                "macd": float(row['macd']),
-                "atr": float(row['atr'])
-            },
-            risk={
-                "risk_pct": cfg["risk"]["risk_per_trade"],
-                "sl_atr_mult": cfg["risk"]["atr_sl_mult"],
-                "tp_atr_mult": cfg["risk"]["atr_tp_mult"]
-            },
-            confidence=0.75
-        )
-        explanation = explanation_result["text"]
-        print(f"🤖 Explicación IA: {explanation[:150]}...")
-        
-        # Guardar en reporte
-        report.append({
-            "numero": i,
-            "timestamp": str(timestamp),
-            "tipo": signal_type,
-            "accion": action,
-            "precio": float(row['close']),
-            "indicadores": {
-                "ema_fast": float(row['ema_fast']),
-                "ema_slow": float(row['ema_slow']),
-                "rsi": float(row['rsi']),
-                "macd": float(row['macd']),
-                "atr": float(row['atr'])
-            },
-            "explicacion_ia": explanation
-        })
-    except Exception as e:
-        print(f"⚠️ Error generando explicación: {e}")
-        report.append({
-            "numero": i,
-            "timestamp": str(timestamp),
-            "tipo": signal_type,
-            "accion": action,
-            "precio": float(row['close']),
-            "indicadores": {
-                "ema_fast": float(row['ema_fast']),
-                "ema_slow": float(row['ema_slow']),
-                "rsi": float(row['rsi']),
-                "macd": float(row['macd']),
-                "atr": float(row['atr'])
-            },
-            "explicacion_ia": "Error al generar explicación"
-        })
+    explanation = result["text"] if result is not None else "Error al generar explicación"
+    print(f"🤖 Explicación IA: {explanation[:150]}...")
+    
+    # Guardar en reporte
+    report.append({
+        "numero": i,
+        "timestamp": str(timestamp),
+        "tipo": signal_type,
+        "accion": action,
+        "precio": float(row['close']),
+        "indicadores": indicadores(row),
+        "explicacion_ia": explanation
+    })
 
 # Guardar reporte JSON
 output_file = "reporte_señales_completo.json"
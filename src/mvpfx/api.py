@@ -9,16 +9,72 @@ if __package__ is None or __package__ == "":
         sys.path.insert(0, _SRC)
 # ---------------
 
-from fastapi import FastAPI
+import json
+import math
+import time
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Literal
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from mvpfx.config import get_cfg
-from mvpfx.data import load_data
+from mvpfx.data import load_data, timeframe_to_minutes
 from mvpfx.indicators import compute_all_indicators
 from mvpfx.strategy import generate_signals
-from mvpfx.llm_stub import explain_trade
+from mvpfx.llm_stub import explain_trade, get_cache
+from mvpfx.response_cache import BarAlignedCache, config_hash
+from mvpfx import instrument
+from mvpfx.scheduler import BarScheduler
+from mvpfx.stream import Broadcaster, sse_events
 
-app = FastAPI(title="EURUSD MVP API", version="0.1.1")
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json estándar
+    orjson = None
+
+# Ingesta en segundo plano (api.scheduler): /signals sirve el último snapshot publicado
+scheduler: BarScheduler | None = None
+# /stream/signals: el scheduler es el único productor y difunde las barras nuevas a todos los clientes
+broadcaster = Broadcaster()
+
+def _push_bars(snap, new) -> None:
+    broadcaster.publish_threadsafe("bars", encode_signals(new, "rows"))
+
+# Varios símbolos: descargas en `fetch_pool` (I/O) e indicadores/señales en `compute_pool`; viven con la app (lifespan)
+fetch_pool: ThreadPoolExecutor | None = None
+compute_pool: ThreadPoolExecutor | None = None
+# Descargas en curso en `fetch_pool`, incluidas las que ya vencieron su timeout (el hilo sigue ocupado hasta que acaba)
+_fetch_lock = threading.Lock()
+fetch_stats = {"running": 0, "timeouts": 0}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global scheduler, fetch_pool, compute_pool
+    fetch_pool = ThreadPoolExecutor(max_workers=cfg["api"].get("signals_max_concurrency", 8), thread_name_prefix="fetch")
+    compute_pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="signals")
+    broadcaster.maxsize = cfg["api"].get("stream_queue", 16)
+    broadcaster.bind(asyncio.get_running_loop())
+    if cfg["api"].get("scheduler", False):
+        scheduler = BarScheduler(cfg, encode=encode_signals, on_publish=_push_bars)
+        scheduler.start()
+    try:
+        yield
+    finally:
+        if scheduler is not None:
+            await scheduler.stop()
+            scheduler = None
+        # Sin esperar a descargas colgadas: las encoladas se cancelan y las activas acaban con su timeout
+        for pool in (fetch_pool, compute_pool):
+            pool.shutdown(wait=False, cancel_futures=True)
+        fetch_pool = compute_pool = None
+
+app = FastAPI(title="EURUSD MVP API", version="0.1.1", lifespan=lifespan)
 cfg = get_cfg()
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +94,28 @@ class Signal(BaseModel):
     sl: float | None
     tp: float | None
 
+class SignalsColumnar(BaseModel):
+    """`format=columnar`: los campos de `Signal` como un array por campo."""
+    timestamp: list[str]
+    open: list[float]
+    high: list[float]
+    low: list[float]
+    close: list[float]
+    price: list[float]
+    signal: list[int]
+    score: list[float]
+    sl: list[float | None]
+    tp: list[float | None]
+
+class SignalsBySymbol(BaseModel):
+    """`symbols=...` y POST /signals/batch: señales por símbolo (filas o columnar) y errores por símbolo."""
+    symbols: dict[str, list[Signal] | SignalsColumnar]
+    errors: dict[str, str]
+
+# /signals devuelve bytes ya serializados (Response), así que no hay response_model: las formas se documentan aquí
+SIGNALS_RESPONSES = {200: {"model": list[Signal] | SignalsColumnar | SignalsBySymbol,
+                           "description": "Filas (`format=rows`), columnar (`format=columnar`) o por símbolo (`symbols=...`)"}}
+
 class OrderRequest(BaseModel):
     side: str; qty: int; order_type: str = "MKT"; limit_price: float | None = None; stop_price: float | None = None
 
@@ -47,15 +125,22 @@ class OrderResponse(BaseModel):
 class Explanation(BaseModel):
     json: dict; text: str
 
-@app.get("/signals", response_model=list[Signal])
-def get_signals():
-    """Obtener señales de trading con datos frescos de yfinance"""
-    # Cargar datos directamente con yfinance (sin cache)
-    from mvpfx.data import fetch_yfinance
-    
+def _fetch_bars(symbol: str, timeframe: str, bars: int):
+    # Cargar datos con yfinance (con caché incremental si data.cache está activo)
+    from mvpfx.data import fetch_yfinance, fetch_yfinance_cached
+    fetch = fetch_yfinance_cached if cfg["data"].get("cache", False) else fetch_yfinance
+    with instrument.span("data.fetch", symbol=symbol, timeframe=timeframe) as sp:
+        # Timeout de la propia petición: un hilo de `fetch_pool` no queda ocupado más allá de api.signals_timeout
+        df = fetch(symbol, timeframe, bars, timeout=cfg["api"].get("signals_timeout", 20.0))
+        sp.set(rows=len(df))
+    return df
+
+def signals_frame(symbol: str | None = None):
     # Obtener datos frescos (250 barras para tener suficiente después del warmup)
-    df = fetch_yfinance(cfg["symbol"], cfg["timeframe"], 250)
-    
+    df = _fetch_bars(symbol or cfg["symbol"], cfg["timeframe"], 250)
+    return frame_from_bars(df)
+
+def frame_from_bars(df):
     # Calcular indicadores
     df = compute_all_indicators(df, cfg)
     
@@ -64,24 +149,179 @@ def get_signals():
     df = df.iloc[warmup:].copy()
     
     # Generar señales
-    df = generate_signals(df, cfg)
-    
-    # Retornar TODAS las barras (no solo las últimas 200)
-    out = []
-    for ts, row in df.iterrows():
-        out.append(Signal(
-            timestamp=ts.isoformat(),
-            open=float(row["open"]),
-            high=float(row["high"]),
-            low=float(row["low"]),
-            close=float(row["close"]),
-            price=float(row["close"]),
-            signal=int(row["signal"]),
-            score=float(row["score"]),
-            sl=float(row["sl"]) if row["signal"]!=0 else None,
-            tp=float(row["tp"]) if row["signal"]!=0 else None
-        ))
-    return out
+    return generate_signals(df, cfg)
+
+def _nan_to_none(a: np.ndarray) -> list:
+    return np.where(np.isnan(a), None, a).tolist()
+
+def signals_columns(df) -> dict[str, list]:
+    """Campos de `Signal` como listas construidas desde NumPy (sin validación por fila)."""
+    idx = df.index.tz_convert("UTC").tz_localize(None)
+    sig = df["signal"].to_numpy().astype(np.int64)
+    active = sig != 0
+    close = df["close"].to_numpy(dtype=np.float64)
+    return {
+        "timestamp": [t + "+00:00" for t in np.datetime_as_string(idx.to_numpy(), unit="s").tolist()],
+        "open": df["open"].to_numpy(dtype=np.float64).tolist(),
+        "high": df["high"].to_numpy(dtype=np.float64).tolist(),
+        "low": df["low"].to_numpy(dtype=np.float64).tolist(),
+        "close": close.tolist(),
+        "price": close.tolist(),
+        "signal": sig.tolist(),
+        "score": df["score"].to_numpy(dtype=np.float64).tolist(),
+        "sl": _nan_to_none(np.where(active, df["sl"].to_numpy(dtype=np.float64), np.nan)),
+        "tp": _nan_to_none(np.where(active, df["tp"].to_numpy(dtype=np.float64), np.nan)),
+    }
+
+def _json_safe(obj):
+    # Como orjson: NaN/inf -> null (json estándar emitiría `NaN`, que no es JSON válido)
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(v) for v in obj]
+    return obj
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(_json_safe(obj), separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+def encode_signals(df, fmt: str = "rows") -> bytes:
+    cols = signals_columns(df)
+    if fmt == "columnar":
+        return _dumps(cols)
+    keys = list(cols)
+    return _dumps([dict(zip(keys, row)) for row in zip(*cols.values())])
+
+# Respuesta de /signals cacheada hasta el próximo cierre de barra (y como mucho api.signals_cache_ttl s)
+signals_cache = BarAlignedCache(ttl=cfg["api"].get("signals_cache_ttl"))
+
+class SignalsBatchRequest(BaseModel):
+    symbols: list[str]
+    format: Literal["rows", "columnar"] = "rows"
+    timeout: float | None = None
+
+def _tracked_fetch(symbol: str, timeframe: str, bars: int):
+    with _fetch_lock:
+        fetch_stats["running"] += 1
+    try:
+        return _fetch_bars(symbol, timeframe, bars)
+    finally:
+        with _fetch_lock:
+            fetch_stats["running"] -= 1
+
+async def _symbol_body(symbol: str, fmt: str, timeout: float) -> bytes:
+    tf = cfg["timeframe"]
+    if fetch_pool is None or compute_pool is None:
+        raise RuntimeError("pools no iniciados (la app no ha arrancado)")
+    async def compute() -> bytes:
+        loop = asyncio.get_running_loop()
+        try:
+            df = await asyncio.wait_for(loop.run_in_executor(fetch_pool, _tracked_fetch, symbol, tf, 250), timeout)
+        except asyncio.TimeoutError:
+            with _fetch_lock:
+                fetch_stats["timeouts"] += 1
+            raise
+        return await loop.run_in_executor(compute_pool, lambda: encode_signals(frame_from_bars(df), fmt))
+    if not cfg["api"].get("signals_cache", True):
+        return await compute()
+    return await signals_cache.aget_or_compute((symbol, tf, config_hash(cfg), fmt), tf, compute)
+
+async def multi_signals(symbols: list[str], fmt: str = "rows", timeout: float | None = None,
+                        max_concurrency: int | None = None) -> bytes:
+    """
+    Señales de varios símbolos: descargas concurrentes (como mucho `max_concurrency` a la vez,
+    cada una con `timeout` s) y cálculo en `compute_pool`. Los símbolos que fallan van a
+    `errors` y el resto se devuelve igualmente.
+    """
+    api_cfg = cfg["api"]
+    timeout = timeout or api_cfg.get("signals_timeout", 20.0)
+    sem = asyncio.Semaphore(max_concurrency or api_cfg.get("signals_max_concurrency", 8))
+    symbols = list(dict.fromkeys(s.strip() for s in symbols if s.strip()))
+    async def one(symbol: str) -> bytes:
+        async with sem:
+            return await _symbol_body(symbol, fmt, timeout)
+    results = await asyncio.gather(*(one(s) for s in symbols), return_exceptions=True)
+    ok = {s: r for s, r in zip(symbols, results) if not isinstance(r, BaseException)}
+    errors = {s: f"{type(r).__name__}: {r}" if str(r) else type(r).__name__
+              for s, r in zip(symbols, results) if isinstance(r, BaseException)}
+    # Los cuerpos por símbolo ya están serializados: se insertan sin volver a parsearlos
+    parts = b",".join(_dumps(s) + b":" + body for s, body in ok.items())
+    return b'{"symbols":{' + parts + b'},"errors":' + _dumps(errors) + b"}"
+
+@app.get("/signals", responses=SIGNALS_RESPONSES)
+async def get_signals(format: Literal["rows", "columnar"] = "rows", symbols: str | None = None,
+                      profile: Literal["cprofile", "tracemalloc"] | None = None):
+    """Obtener señales de trading (recalculadas una vez por barra y servidas desde caché).
+
+    `format=columnar` devuelve un objeto con un array por campo en lugar de una lista de filas.
+    `symbols=AAPL,MSFT,...` devuelve `{"symbols": {símbolo: señales}, "errors": {símbolo: error}}`.
+    `profile` (solo con `instrument.profile_dir` configurado) recalcula sin caché y vuelca el perfil.
+    """
+    if symbols:
+        body = await multi_signals(symbols.split(","), format)
+        return Response(body, media_type="application/json")
+    return await run_in_threadpool(_single_signals, format, profile)
+
+@app.post("/signals/batch", responses={200: {"model": SignalsBySymbol}})
+async def post_signals_batch(req: SignalsBatchRequest):
+    body = await multi_signals(req.symbols, req.format, req.timeout)
+    return Response(body, media_type="application/json")
+
+def _fresh_snapshot():
+    # Si el scheduler lleva más de api.snapshot_max_bars barras sin refrescar (descargas fallando,
+    # bucle parado) su snapshot ya no es el último cierre: se calcula en vivo
+    if scheduler is None:
+        return None
+    age = scheduler.age()
+    max_age = cfg["api"].get("snapshot_max_bars", 2) * timeframe_to_minutes(cfg["timeframe"]) * 60
+    return scheduler.snapshot if age is not None and age <= max_age else None
+
+def _single_signals(format: str, profile: str | None) -> Response:
+    snap = _fresh_snapshot()
+    if snap is not None and format in snap.bodies and not profile:
+        return Response(snap.bodies[format], media_type="application/json")
+    compute = lambda: encode_signals(signals_frame(), format)
+    profile_dir = cfg.get("instrument", {}).get("profile_dir")
+    if profile and profile_dir:
+        ext = "prof" if profile == "cprofile" else "txt"
+        path = os.path.join(profile_dir, f"signals_{int(time.time() * 1000)}.{ext}")
+        with instrument.profile(profile, path):
+            body = compute()
+        return Response(body, media_type="application/json", headers={"X-Profile-Path": path})
+    if not cfg["api"].get("signals_cache", True):
+        return Response(compute(), media_type="application/json")
+    key = (cfg["symbol"], cfg["timeframe"], config_hash(cfg), format)
+    body = signals_cache.get_or_compute(key, cfg["timeframe"], compute)
+    return Response(body, media_type="application/json")
+
+@app.get("/signals/cache")
+def get_signals_cache_stats():
+    snap = scheduler.snapshot if scheduler is not None else None
+    return {**signals_cache.stats(), "stream": broadcaster.stats(), "fetch": dict(fetch_stats),
+            "snapshot": {"bar": snap.bar.isoformat(), "updated": snap.updated, "checked": scheduler.checked,
+                         "stale": _fresh_snapshot() is None} if snap is not None else None}
+
+async def _stream_snapshot() -> bytes:
+    return (await run_in_threadpool(_single_signals, "rows", None)).body
+
+@app.get("/stream/signals")
+async def stream_signals():
+    """Server-Sent Events: `snapshot` (todas las filas) al conectar y después `bars` con solo las nuevas.
+
+    Un cliente que no consume a tiempo recibe otro `snapshot` en lugar de los `bars` descartados.
+    Sin `api.scheduler` no hay productor: solo se envía el snapshot y keepalives.
+    """
+    events = sse_events(broadcaster, _stream_snapshot, cfg["api"].get("stream_heartbeat", 15))
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics")
+def get_metrics():
+    """Histogramas de los spans instrumentados (vacío si `instrument.enabled` es false)."""
+    return {"enabled": instrument.enabled(), "spans": instrument.metrics()}
 
 @app.post("/orders", response_model=OrderResponse)
 def post_order(req: OrderRequest):
@@ -97,6 +337,11 @@ def get_explanations():
     )
     return Explanation(json=data["json"], text=data["text"])
 
+@app.get("/explanations/cache")
+def get_explanations_cache_stats():
+    cache = get_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
+
 if __name__ == "__main__":
     import uvicorn
     cfg = get_cfg()
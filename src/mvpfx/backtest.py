@@ -17,7 +17,9 @@ from mvpfx.config import get_cfg
 from mvpfx.data import load_data
 from mvpfx.indicators import compute_all_indicators
 from mvpfx.strategy import generate_signals
-from mvpfx.risk import position_size, enforce_daily_limits
+from mvpfx.features import FeatureFrame, compute_features
+from mvpfx.risk import position_size, enforce_daily_limits, DailyRiskLedger
+from mvpfx.instrument import span, profile
 
 @dataclass
 class BTResult:
@@ -37,11 +39,23 @@ def compute_metrics(equity: pd.Series) -> dict:
     dd = (equity / equity.cummax() - 1.0).min()
     return {"CAGR": float(cagr), "Sharpe": float(sharpe), "Sortino": float(sortino), "MaxDrawdown": float(dd), "Bars": int(len(ret))}
 
-def run_backtest() -> BTResult:
-    cfg = get_cfg()
-    df = load_data()
+def prepare_backtest_frame(df: pd.DataFrame | None = None, cfg: dict | None = None) -> pd.DataFrame | FeatureFrame:
+    """
+    Indicadores + señales y recorte de warmup (entrada común de los motores).
+
+    Con `features.compact` devuelve un `FeatureFrame` (buffer único, sin copias del frame).
+    """
+    if cfg is None:
+        cfg = get_cfg()
+    if df is None:
+        df = load_data(cfg)
+    if cfg.get("features", {}).get("compact", False):
+        return compute_features(df, cfg).window(cfg["warmup_bars"])
     df = compute_all_indicators(df, cfg)
-    df = generate_signals(df, cfg).iloc[cfg["warmup_bars"]:]
+    return generate_signals(df, cfg).iloc[cfg["warmup_bars"]:]
+
+def _legacy_loop(df: pd.DataFrame, cfg: dict) -> tuple[pd.Series, pd.DataFrame]:
+    """Bucle original barra a barra (iterrows). Se conserva como referencia para los tests de equivalencia."""
     ex, rk = cfg["execution"], cfg["risk"]
     equity = rk["capital"]
     position, units, entry = 0, 0, np.nan
@@ -65,7 +79,7 @@ def run_backtest() -> BTResult:
                 trade_log.loc[ts] = {"side":"short","entry":entry,"exit":exit_price,"pnl":pnl}
                 position, units = 0, 0
 
-        if position == 0 and not enforce_daily_limits(trade_log, rk["capital"]):
+        if position == 0 and not enforce_daily_limits(trade_log, rk["capital"], cfg):
             sig = int(row["signal"])
             if sig == 1:
                 units = position_size(equity, ask, row["atr"], cfg); entry = ask; position = 1
@@ -77,19 +91,226 @@ def run_backtest() -> BTResult:
         equity_curve.append((ts, equity))
 
     eq = pd.Series({t:v for t,v in equity_curve})
-    trades = pd.DataFrame(records)
-    metrics = compute_metrics(eq)
-    last_eq = float(eq.iloc[-1]) if len(eq) > 0 else rk["capital"]
-    with open("backtest_report.json","w",encoding="utf-8") as f:
-        json.dump({"metrics":metrics,"last_equity":last_eq}, f, indent=2)
-    return BTResult(equity_curve=eq, trades=trades, metrics=metrics)
+    return eq, pd.DataFrame(records)
+
+def simulate_arrays(index: pd.DatetimeIndex, close: np.ndarray, sl: np.ndarray, tp: np.ndarray,
+                    atr: np.ndarray, signal: np.ndarray, cfg: dict) -> tuple[pd.Series, pd.DataFrame]:
+    """
+    Motor por eventos sobre arrays float64 contiguos.
+
+    Solo se visitan las barras donde puede ocurrir algo (señal o SL/TP definidos);
+    entre eventos la equity es constante y se rellena con un cumsum. Reproduce
+    exactamente la semántica de `_legacy_loop`, incluido el límite diario
+    evaluado sobre el día de la última salida.
+    """
+    ex, rk = cfg["execution"], cfg["risk"]
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    sl = np.ascontiguousarray(sl, dtype=np.float64)
+    tp = np.ascontiguousarray(tp, dtype=np.float64)
+    atr = np.ascontiguousarray(atr, dtype=np.float64)
+    signal = np.ascontiguousarray(signal, dtype=np.int64)
+    n = len(close)
+    ask = close + ex["simulate_spread"]/2 + ex["simulate_slippage"]
+    bid = close - ex["simulate_spread"]/2 - ex["simulate_slippage"]
+    events = np.flatnonzero((signal != 0) | ~np.isnan(sl) | ~np.isnan(tp))
+
+    capital = rk["capital"]
+    equity = capital
+    deltas = np.zeros(n, dtype=np.float64)
+    if n:
+        deltas[0] = capital
+    position, units, entry = 0, 0, np.nan
+    records = []
+    ledger = DailyRiskLedger(capital, cfg)
+
+    for i in events:
+        ts = index[i]
+        if position != 0:
+            exit_price = None
+            if position == 1 and (bid[i] <= sl[i] or bid[i] >= tp[i]):
+                exit_price = bid[i]; pnl = (exit_price - entry) * units
+            elif position == -1 and (ask[i] >= sl[i] or ask[i] <= tp[i]):
+                exit_price = ask[i]; pnl = (entry - exit_price) * units
+            if exit_price is not None:
+                equity += pnl; deltas[i] += pnl
+                records.append({"time":ts,"type":"exit","price":float(exit_price),"pnl":float(pnl)})
+                ledger.record(ts, pnl)
+                position, units = 0, 0
+
+        if position == 0:
+            if not ledger.limit_hit():
+                sig = signal[i]
+                if sig == 1:
+                    units = position_size(equity, ask[i], atr[i], cfg); entry = ask[i]; position = 1
+                    records.append({"time":ts,"type":"entry_long","price":float(entry),"units":units})
+                elif sig == -1:
+                    units = position_size(equity, bid[i], atr[i], cfg); entry = bid[i]; position = -1
+                    records.append({"time":ts,"type":"entry_short","price":float(entry),"units":units})
+
+    eq = pd.Series(np.cumsum(deltas), index=index)
+    return eq, pd.DataFrame(records)
+
+SAME_BAR_POLICIES = ("sl_first", "tp_first", "nearest_open")
+
+def first_touch(low: np.ndarray, high: np.ndarray, start: int, below: float, above: float,
+                block: int = 64) -> int:
+    """
+    Primer índice j >= start con low[j] <= below o high[j] >= above (-1 si no hay).
+
+    Búsqueda vectorizada por bloques crecientes (argmax sobre la máscara del bloque):
+    el coste es proporcional a la duración de la operación, no al total de barras.
+    """
+    n = len(low)
+    while start < n:
+        stop = min(n, start + block)
+        hit = (low[start:stop] <= below) | (high[start:stop] >= above)
+        j = int(np.argmax(hit))
+        if hit[j]:
+            return start + j
+        start, block = stop, block * 2
+    return -1
+
+def intrabar_exit(side: int, o: float, hi: float, lo: float, stop: float, target: float,
+                  policy: str) -> tuple[float, str] | None:
+    """
+    Salida en una barra (open/high/low ya del lado de salida): (precio, "sl"|"tp"), o None si no toca.
+
+    Si SL y TP se tocan en la misma barra decide `policy`; si el open ya está más allá del nivel (gap)
+    se ejecuta al open.
+    """
+    hit_sl = lo <= stop if side == 1 else hi >= stop
+    hit_tp = hi >= target if side == 1 else lo <= target
+    if not (hit_sl or hit_tp):
+        return None
+    if hit_sl and hit_tp:
+        if policy == "sl_first":
+            hit_tp = False
+        elif policy == "tp_first":
+            hit_sl = False
+        else:
+            hit_tp = abs(target - o) < abs(o - stop)
+            hit_sl = not hit_tp
+    level = stop if hit_sl else target
+    gapped = (o <= level) if (side == 1) == hit_sl else (o >= level)
+    return (o if gapped else level), ("sl" if hit_sl else "tp")
+
+def simulate_intrabar(index: pd.DatetimeIndex, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                      close: np.ndarray, sl: np.ndarray, tp: np.ndarray, atr: np.ndarray, signal: np.ndarray,
+                      cfg: dict, policy: str | None = None) -> tuple[pd.Series, pd.DataFrame]:
+    """
+    Modelo de ejecución intrabarra: entrada al cierre de la barra de señal (como `simulate_arrays`),
+    SL/TP fijados en la entrada y salida en la primera barra posterior cuyo high/low (del lado
+    bid para largos, ask para cortos) los toque. Si el open ya está más allá del nivel (gap) se
+    ejecuta al open. Si SL y TP se tocan en la misma barra decide `policy`
+    (`execution.same_bar_policy`): "sl_first" (conservador), "tp_first" o "nearest_open".
+
+    El límite diario se evalúa por día UTC de la barra de entrada.
+    """
+    ex, rk = cfg["execution"], cfg["risk"]
+    policy = policy or ex.get("same_bar_policy", "sl_first")
+    if policy not in SAME_BAR_POLICIES:
+        raise ValueError(f"same_bar_policy desconocida: {policy}")
+    half = ex["simulate_spread"]/2 + ex["simulate_slippage"]
+    as_f = lambda a: np.ascontiguousarray(a, dtype=np.float64)
+    open_, high, low, close, sl, tp, atr = map(as_f, (open_, high, low, close, sl, tp, atr))
+    signal = np.ascontiguousarray(signal, dtype=np.int64)
+    n = len(close)
+    # Lado bid (salida de largos) y ask (salida de cortos)
+    bid_o, bid_h, bid_l = open_ - half, high - half, low - half
+    ask_o, ask_h, ask_l = open_ + half, high + half, low + half
+    entries = np.flatnonzero((signal != 0) & ~np.isnan(sl) & ~np.isnan(tp))
+
+    capital = rk["capital"]
+    equity = capital
+    deltas = np.zeros(n, dtype=np.float64)
+    if n:
+        deltas[0] = capital
+    records = []
+    ledger = DailyRiskLedger(capital, cfg)
+    k = 0
+    while k < len(entries):
+        e = entries[k]; k += 1
+        ts = index[e]
+        if ledger.limit_hit(ts):
+            continue
+        side = signal[e]
+        price = close[e] + half if side == 1 else close[e] - half
+        units = position_size(equity, price, atr[e], cfg)
+        stop, target = sl[e], tp[e]
+        records.append({"time":ts,"type":"entry_long" if side == 1 else "entry_short","price":float(price),
+                        "units":units,"sl":float(stop),"tp":float(target)})
+        if side == 1:
+            x = first_touch(bid_l, bid_h, e + 1, stop, target)
+        else:
+            # Para cortos el SL queda arriba y el TP abajo
+            x = first_touch(ask_l, ask_h, e + 1, target, stop)
+        if x < 0:
+            break  # posición abierta hasta el final de los datos
+        o, hi_, lo_ = (bid_o[x], bid_h[x], bid_l[x]) if side == 1 else (ask_o[x], ask_h[x], ask_l[x])
+        exit_price, reason = intrabar_exit(side, o, hi_, lo_, stop, target, policy)
+        pnl = (exit_price - price) * units if side == 1 else (price - exit_price) * units
+        equity += pnl; deltas[x] += pnl
+        records.append({"time":index[x],"type":"exit","price":float(exit_price),"pnl":float(pnl),
+                        "reason":reason})
+        ledger.record(index[x], pnl)
+        # Se puede volver a entrar en la misma barra de salida
+        k = int(np.searchsorted(entries, x, side="left"))
+
+    eq = pd.Series(np.cumsum(deltas), index=index)
+    return eq, pd.DataFrame(records)
+
+ENGINES = ("vectorized", "intrabar", "legacy")
+
+def backtest_signals(df: pd.DataFrame | FeatureFrame, cfg: dict, engine: str | None = None) -> BTResult:
+    """
+    Simula sobre un frame (o `FeatureFrame`) que ya tiene indicadores, señales y warmup aplicado.
+
+    `engine` por defecto es `execution.engine` (así lo eligen también optimize, walkforward y portfolio).
+    """
+    engine = engine or cfg["execution"].get("engine", "intrabar")
+    with span("backtest", engine=engine) as sp:
+        sp.set(rows=len(df))
+        return _backtest_signals(df, cfg, engine)
+
+def _backtest_signals(df: pd.DataFrame | FeatureFrame, cfg: dict, engine: str) -> BTResult:
+    col = lambda k: np.asarray(df[k])
+    if engine == "vectorized":
+        eq, trades = simulate_arrays(df.index, col("close"), col("sl"), col("tp"), col("atr"), col("signal"), cfg)
+    elif engine == "intrabar":
+        eq, trades = simulate_intrabar(df.index, col("open"), col("high"), col("low"), col("close"),
+                                       col("sl"), col("tp"), col("atr"), col("signal"), cfg)
+    elif engine == "legacy":
+        eq, trades = _legacy_loop(df.to_frame() if isinstance(df, FeatureFrame) else df, cfg)
+    else:
+        raise ValueError(f"engine desconocido: {engine}")
+    return BTResult(equity_curve=eq, trades=trades, metrics=compute_metrics(eq))
+
+def run_backtest(df: pd.DataFrame | None = None, cfg: dict | None = None, engine: str | None = None,
+                 report_path: str | None = "backtest_report.json") -> BTResult:
+    if cfg is None:
+        cfg = get_cfg()
+    res = backtest_signals(prepare_backtest_frame(df, cfg), cfg, engine)
+    eq, metrics = res.equity_curve, res.metrics
+    last_eq = float(eq.iloc[-1]) if len(eq) > 0 else cfg["risk"]["capital"]
+    if report_path:
+        with open(report_path,"w",encoding="utf-8") as f:
+            json.dump({"metrics":metrics,"last_equity":last_eq}, f, indent=2)
+    return res
 
 if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser(description="Run backtest")
     p.add_argument("--print", action="store_true", help="Imprime métricas")
+    p.add_argument("--engine", choices=ENGINES, help="Motor de simulación (por defecto execution.engine)")
+    p.add_argument("--profile", choices=["cprofile","tracemalloc"], help="Volcar perfil de esta ejecución")
     args = p.parse_args()
-    res = run_backtest()
+    if args.profile:
+        out = "backtest_profile.prof" if args.profile == "cprofile" else "backtest_tracemalloc.txt"
+        with profile(args.profile, out):
+            res = run_backtest(engine=args.engine)
+        print(f"Perfil guardado en {out}")
+    else:
+        res = run_backtest(engine=args.engine)
     if args.print:
         print(res.metrics)
     print("OK: backtest_report.json generado.")
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import json
+import numpy as np
+import pandas as pd
+
+# Formato: un directorio con timestamp.npy (int64 epoch-ns UTC), un .npy float64 por
+# columna OHLCV y un index.json con columnas, nº de filas y rango temporal.
+COLUMNS = ["open", "high", "low", "close", "volume"]
+INDEX_FILE = "index.json"
+VERSION = 1
+
+def _write_index(path: str, columns: list[str], ts: np.ndarray) -> None:
+    meta = {
+        "version": VERSION, "columns": columns, "rows": int(len(ts)),
+        "start": pd.Timestamp(int(ts[0]), tz="UTC").isoformat() if len(ts) else None,
+        "end": pd.Timestamp(int(ts[-1]), tz="UTC").isoformat() if len(ts) else None,
+    }
+    with open(os.path.join(path, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+def _to_ns(t) -> int:
+    t = pd.Timestamp(t)
+    return (t.tz_localize("UTC") if t.tz is None else t.tz_convert("UTC")).value
+
+def read_index(path: str) -> dict:
+    with open(os.path.join(path, INDEX_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != VERSION:
+        raise ValueError(f"Versión de bar store no soportada: {meta.get('version')}")
+    return meta
+
+def write_bar_store(df: pd.DataFrame, path: str) -> None:
+    """Escribe un DataFrame OHLCV (índice UTC ordenado) como bar store."""
+    if not df.index.is_monotonic_increasing:
+        raise ValueError("El índice debe estar ordenado")
+    os.makedirs(path, exist_ok=True)
+    idx = df.index.tz_localize("UTC") if df.index.tz is None else df.index.tz_convert("UTC")
+    ts = idx.as_unit("ns").asi8
+    np.save(os.path.join(path, "timestamp.npy"), ts)
+    columns = [c for c in COLUMNS if c in df]
+    for c in columns:
+        np.save(os.path.join(path, f"{c}.npy"), df[c].to_numpy(dtype=np.float64))
+    _write_index(path, columns, ts)
+
+def csv_to_bar_store(csv_path: str, path: str, chunksize: int = 1_000_000) -> int:
+    """Convierte el CSV de `data.py --out` por bloques, sin cargarlo entero en memoria."""
+    with open(csv_path, "rb") as f:
+        rows = sum(1 for _ in f) - 1
+    header = pd.read_csv(csv_path, nrows=0).columns
+    columns = [c for c in COLUMNS if c in header]
+    os.makedirs(path, exist_ok=True)
+    fmt = np.lib.format
+    ts = fmt.open_memmap(os.path.join(path, "timestamp.npy"), mode="w+", dtype=np.int64, shape=(rows,))
+    cols = {c: fmt.open_memmap(os.path.join(path, f"{c}.npy"), mode="w+", dtype=np.float64, shape=(rows,))
+            for c in columns}
+    pos, last = 0, None
+    for chunk in pd.read_csv(csv_path, usecols=["timestamp"] + columns, chunksize=chunksize):
+        t = pd.DatetimeIndex(pd.to_datetime(chunk["timestamp"], utc=True)).as_unit("ns").asi8
+        if len(t) and ((last is not None and t[0] < last) or np.any(np.diff(t) < 0)):
+            raise ValueError("El CSV debe estar ordenado por timestamp")
+        n = len(t)
+        ts[pos:pos+n] = t
+        for c in columns:
+            cols[c][pos:pos+n] = chunk[c].to_numpy(dtype=np.float64)
+        pos += n
+        last = t[-1] if n else last
+    ts.flush()
+    for m in cols.values():
+        m.flush()
+    if pos != rows:
+        # Líneas en blanco al final: se reescriben los arrays con el tamaño real
+        ts = np.array(ts[:pos]); np.save(os.path.join(path, "timestamp.npy"), ts)
+        for c, m in cols.items():
+            np.save(os.path.join(path, f"{c}.npy"), np.array(m[:pos]))
+    _write_index(path, columns, np.asarray(ts))
+    return pos
+
+def open_bar_store(path: str, start=None, end=None) -> pd.DataFrame:
+    """
+    Abre el bar store con np.memmap y devuelve solo [start, end] (ambos inclusivos).
+
+    El rango se localiza por búsqueda binaria sobre los timestamps; solo se leen
+    del disco las páginas del tramo pedido.
+    """
+    meta = read_index(path)
+    ts = np.load(os.path.join(path, "timestamp.npy"), mmap_mode="r")
+    lo = 0 if start is None else int(np.searchsorted(ts, _to_ns(start), side="left"))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, _to_ns(end), side="right"))
+    idx = pd.DatetimeIndex(np.array(ts[lo:hi]), tz="UTC")
+    data = {c: np.array(np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r")[lo:hi]) for c in meta["columns"]}
+    return pd.DataFrame(data, index=idx)
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Convertir CSV OHLCV (data.py --out) a bar store memmap")
+    p.add_argument("--csv", required=True, help="CSV de entrada con columna timestamp")
+    p.add_argument("--out", required=True, help="Directorio del bar store")
+    p.add_argument("--chunksize", type=int, default=1_000_000)
+    args = p.parse_args()
+    n = csv_to_bar_store(args.csv, args.out, args.chunksize)
+    print(f"Guardado en {args.out} ({n} barras)")
@@ -1,13 +1,5 @@
 from __future__ import annotations
 
-import asyncio
-import sys
-if sys.version_info >= (3, 10):
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        asyncio.set_event_loop(asyncio.new_event_loop())
-
 # --- Bootstrap ---
 import os, sys
 if __package__ is None or __package__ == "":
@@ -18,17 +10,34 @@ if __package__ is None or __package__ == "":
 # ---------------
 
 import os
-from typing import Optional
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
 import pandas as pd
-from ib_insync import IB, Forex, MarketOrder, LimitOrder, StopOrder, util
 from mvpfx.config import get_cfg
+from mvpfx.instrument import span
+
+if TYPE_CHECKING:
+    from ib_insync import IB
+
+def _ib_insync():
+    """Importa ib_insync en el primer uso (necesita un event loop en el hilo actual)."""
+    if sys.version_info >= (3, 10):
+        try:
+            asyncio.get_event_loop_policy().get_event_loop()
+        except RuntimeError:
+            asyncio.set_event_loop(asyncio.new_event_loop())
+    import ib_insync
+    return ib_insync
 
 def connect_ib() -> IB:
     cfg = get_cfg()
     host = os.getenv("IB_HOST","127.0.0.1")
     port = int(os.getenv("IB_PORT","7497"))
     client_id = int(os.getenv("IB_CLIENT_ID","1001"))
-    ib = IB()
+    ib = _ib_insync().IB()
     ib.connect(host, port, clientId=client_id, readonly=True, timeout=20)
     return ib
 
@@ -41,51 +50,198 @@ def get_symbol_contract(symbol: str):
         quote = symbol[3:]
     else:
         raise ValueError(f"Formato de símbolo inválido: {symbol}")
-    return Forex(base + quote)
+    return _ib_insync().Forex(base + quote)
 
-def get_historical_bars(symbol: str, timeframe: str, duration: str = "2 D") -> pd.DataFrame:
-    ib = connect_ib()
-    c = get_symbol_contract(symbol)
-    ib.qualifyContracts(c)
-    barSize = {"M1":"1 min","M5":"5 mins","M15":"15 mins","H1":"1 hour"}[timeframe.upper()]
-    bars = ib.reqHistoricalData(c, endDateTime="", durationStr=duration, barSizeSetting=barSize,
-                                whatToShow="MIDPOINT", useRTH=False, formatDate=1)
-    df = util.df(bars)
-    df = df.rename(columns={"date":"timestamp"})
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-    df = df.set_index("timestamp")[["open","high","low","close","volume"]]
-    ib.disconnect()
-    return df
+# Estados que confirman que el broker ha procesado la orden (ack) o la ha cerrado
+ACK_STATES = {"PreSubmitted", "Submitted", "Filled", "Cancelled", "ApiCancelled", "Inactive"}
+DONE_STATES = {"Filled", "Cancelled", "ApiCancelled"}
+BAR_SIZES = {"M1":"1 min","M5":"5 mins","M15":"15 mins","H1":"1 hour"}
 
-def place_order(symbol: str, side: str, qty: int, order_type: str = "MKT",
-                limit_price: Optional[float]=None, stop_price: Optional[float]=None):
+def _check_paper() -> None:
     cfg = get_cfg()
-    if cfg["flags"]["paper_only"] or os.getenv("PAPER","true").lower()=="true":
-        pass
-    else:
+    if not (cfg["flags"]["paper_only"] or os.getenv("PAPER","true").lower()=="true"):
         raise RuntimeError("Modo LIVE deshabilitado en el MVP.")
-    ib = connect_ib()
-    c = get_symbol_contract(symbol); ib.qualifyContracts(c)
+
+def _make_order(side: str, qty: int, order_type: str, limit_price: Optional[float], stop_price: Optional[float]):
+    ibi = _ib_insync()
+    action = "BUY" if side=="long" else "SELL"
     if order_type.upper()=="MKT":
-        order = MarketOrder("BUY" if side=="long" else "SELL", qty)
+        return ibi.MarketOrder(action, qty)
     elif order_type.upper()=="LMT":
         if limit_price is None: raise ValueError("limit_price requerido")
-        order = LimitOrder("BUY" if side=="long" else "SELL", qty, limit_price)
+        return ibi.LimitOrder(action, qty, limit_price)
     elif order_type.upper()=="STP":
         if stop_price is None: raise ValueError("stop_price requerido")
-        order = StopOrder("BUY" if side=="long" else "SELL", qty, stop_price)
-    else:
-        raise ValueError(f"Tipo no soportado: {order_type}")
-    trade = ib.placeOrder(c, order); ib.sleep(1.0)
-    status, order_id = trade.orderStatus.status, trade.order.orderId
-    ib.disconnect()
-    return {"orderId": order_id, "status": status}
+        return ibi.StopOrder(action, qty, stop_price)
+    raise ValueError(f"Tipo no soportado: {order_type}")
+
+class IBSession:
+    """
+    Conexión persistente a IB: se conecta una vez, reconecta con backoff exponencial si
+    se cae, cachea contratos cualificados por símbolo y espera eventos de estado de
+    orden (`waitOnUpdate`) en lugar de dormir un tiempo fijo.
+
+    Un `IB` de ib_insync queda ligado al event loop en el que conectó, así que todas las
+    llamadas se ejecutan en un hilo propio de la sesión (con su loop): el scheduler, los
+    handlers de FastAPI y `load_data` pueden usarla a la vez desde cualquier hilo.
+
+    Por defecto es de solo lectura (datos); enviar órdenes requiere `readonly=False`.
+    `ib_factory` permite inyectar un IB falso en tests.
+    """
+
+    def __init__(self, host: str | None = None, port: int | None = None, client_id: int | None = None,
+                 readonly: bool = True, timeout: float = 20, max_retries: int = 5, backoff: float = 0.5,
+                 ib_factory: Callable[[], IB] | None = None, sleep: Callable[[float], None] = time.sleep):
+        self.host = host or os.getenv("IB_HOST","127.0.0.1")
+        self.port = port or int(os.getenv("IB_PORT","7497"))
+        self.client_id = client_id or int(os.getenv("IB_CLIENT_ID","1001"))
+        self.readonly, self.timeout = readonly, timeout
+        self.max_retries, self.backoff = max_retries, backoff
+        self.ib_factory = ib_factory or (lambda: _ib_insync().IB())
+        self.sleep = sleep
+        self.ib: IB | None = None
+        self.contracts: dict[str, object] = {}
+        self.connects = 0
+        self._thread_id: int | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ib", initializer=self._init_thread)
+
+    def _init_thread(self) -> None:
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self._thread_id = threading.get_ident()
+
+    def _call(self, fn: Callable, *args):
+        # Llamadas anidadas desde el propio hilo de IB se ejecutan directamente
+        if threading.get_ident() == self._thread_id:
+            return fn(*args)
+        return self._executor.submit(fn, *args).result()
+
+    def connect(self) -> IB:
+        """Devuelve la conexión viva, (re)conectando con backoff si hace falta."""
+        return self._call(self._connect)
+
+    def _connect(self) -> IB:
+        if self.ib is not None and self.ib.isConnected():
+            return self.ib
+        # Los contratos cualificados siguen siendo válidos tras reconectar
+        for attempt in range(self.max_retries + 1):
+            ib = self.ib_factory()
+            try:
+                ib.connect(self.host, self.port, clientId=self.client_id,
+                           readonly=self.readonly, timeout=self.timeout)
+                self.ib = ib
+                self.connects += 1
+                return ib
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                self.sleep(self.backoff * 2 ** attempt)
+
+    def close(self) -> None:
+        self._call(self._close)
+
+    def _close(self) -> None:
+        if self.ib is not None and self.ib.isConnected():
+            self.ib.disconnect()
+        self.ib = None
+
+    def contract(self, symbol: str):
+        return self._call(self._contract, symbol)
+
+    def _contract(self, symbol: str):
+        key = symbol.replace(".", "").upper()
+        c = self.contracts.get(key)
+        if c is None:
+            c = get_symbol_contract(key)
+            self._connect().qualifyContracts(c)
+            self.contracts[key] = c
+        return c
+
+    def historical_bars(self, symbol: str, timeframe: str, duration: str = "2 D") -> pd.DataFrame:
+        return self._call(self._historical_bars, symbol, timeframe, duration)
+
+    def _historical_bars(self, symbol: str, timeframe: str, duration: str) -> pd.DataFrame:
+        c = self._contract(symbol)
+        with span("broker.bars", symbol=symbol, timeframe=timeframe) as sp:
+            bars = self._connect().reqHistoricalData(c, endDateTime="", durationStr=duration,
+                                                     barSizeSetting=BAR_SIZES[timeframe.upper()],
+                                                     whatToShow="MIDPOINT", useRTH=False, formatDate=1)
+            sp.set(rows=len(bars))
+        df = _ib_insync().util.df(bars)
+        df = df.rename(columns={"date":"timestamp"})
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+        return df.set_index("timestamp")[["open","high","low","close","volume"]]
+
+    def _wait_status(self, trade, states: set[str], timeout: float) -> str:
+        ib = self._connect()
+        deadline = time.monotonic() + timeout
+        while trade.orderStatus.status not in states:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ib.waitOnUpdate(timeout=remaining)
+        return trade.orderStatus.status
+
+    def _check_writable(self) -> None:
+        if self.readonly:
+            raise RuntimeError("Sesión IB de solo lectura: las órdenes requieren readonly=False")
+
+    def place_order(self, symbol: str, side: str, qty: int, order_type: str = "MKT",
+                    limit_price: Optional[float]=None, stop_price: Optional[float]=None,
+                    ack_timeout: float = 5.0) -> dict:
+        """Envía la orden y vuelve en cuanto el broker la confirma (o a los `ack_timeout` s)."""
+        self._check_writable()
+        _check_paper()
+        order = _make_order(side, qty, order_type, limit_price, stop_price)
+        return self._call(self._place_order, symbol, order, order_type, ack_timeout)
+
+    def _place_order(self, symbol: str, order, order_type: str, ack_timeout: float) -> dict:
+        c = self._contract(symbol)
+        with span("broker.place_order", symbol=symbol, order_type=order_type) as sp:
+            trade = self._connect().placeOrder(c, order)
+            status = self._wait_status(trade, ACK_STATES, ack_timeout)
+            sp.set(status=status)
+        return {"orderId": trade.order.orderId, "status": status}
+
+    def cancel_order(self, order_id: int, ack_timeout: float = 5.0) -> dict:
+        self._check_writable()
+        return self._call(self._cancel_order, order_id, ack_timeout)
+
+    def _cancel_order(self, order_id: int, ack_timeout: float) -> dict:
+        ib = self._connect()
+        trades = [t for t in ib.trades() if t.order.orderId == order_id]
+        if not trades:
+            return {"orderId": order_id, "status": "Cancelled"}
+        with span("broker.cancel_order") as sp:
+            ib.cancelOrder(trades[0].order)
+            status = self._wait_status(trades[0], DONE_STATES, ack_timeout)
+            sp.set(status=status)
+        return {"orderId": order_id, "status": status}
+
+# Una sesión de solo lectura (datos) y otra de lectura/escritura (órdenes) por proceso
+_SESSIONS: dict[bool, IBSession] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+def get_session(readonly: bool = True) -> IBSession:
+    """
+    Sesión IB compartida por el proceso. La de órdenes (`readonly=False`) usa
+    `IB_TRADE_CLIENT_ID` (por defecto IB_CLIENT_ID + 1): IB no admite dos conexiones con el mismo clientId.
+    """
+    with _SESSIONS_LOCK:
+        s = _SESSIONS.get(readonly)
+        if s is None:
+            client_id = None if readonly else int(os.getenv("IB_TRADE_CLIENT_ID", int(os.getenv("IB_CLIENT_ID","1001")) + 1))
+            s = _SESSIONS[readonly] = IBSession(client_id=client_id, readonly=readonly)
+        return s
+
+def get_historical_bars(symbol: str, timeframe: str, duration: str = "2 D") -> pd.DataFrame:
+    return get_session().historical_bars(symbol, timeframe, duration)
+
+def place_order(symbol: str, side: str, qty: int, order_type: str = "MKT",
+                limit_price: Optional[float]=None, stop_price: Optional[float]=None):
+    return get_session(readonly=False).place_order(symbol, side, qty, order_type, limit_price, stop_price)
 
 def cancel_order(order_id: int):
-    ib = connect_ib()
-    trades = [t for t in ib.trades() if t.order.orderId == order_id]
-    if trades: ib.cancelOrder(trades[0].order)
-    ib.disconnect(); return {"orderId": order_id, "status": "Cancelled"}
+    return get_session(readonly=False).cancel_order(order_id)
 
 if __name__ == "__main__":
     import argparse
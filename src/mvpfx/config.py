@@ -36,9 +36,20 @@ def get_cfg() -> dict:
             "strategy": {"rsi_long_min": 55, "rsi_short_max": 45, "macd_confirm": True, "min_atr_pct": 0.0003, "regime_threshold": 0.0001},
             "risk": {"capital": 10000.0, "risk_per_trade": 0.0075, "atr_sl_mult": 1.5, "atr_tp_mult": 2.0, "trailing_mult": 0.0,
                      "daily_loss_limit": 0.03, "max_trades_per_day": 6, "max_position_units": 100000, "min_position_units": 1000},
-            "execution": {"simulate_spread": 0.00005, "simulate_slippage": 0.00002},
-            "data": {"source": "simulated", "csv_path": "./data/eurusd.csv", "bars": 3000, "seed": 42},
-            "api": {"host": "127.0.0.1", "port": 8000, "cors_origins": ["*"]},
+            "execution": {"simulate_spread": 0.00005, "simulate_slippage": 0.00002, "engine": "intrabar", "same_bar_policy": "sl_first"},
+            "features": {"compact": False, "dtype": "float64"},
+            "montecarlo": {"paths": 10000, "method": "bootstrap", "seed": 42, "chunk_mb": 256, "ruin_drawdown": 0.2},
+            "data": {"source": "simulated", "csv_path": "./data/eurusd.csv", "store_path": "./data/eurusd_store",
+                     "start": None, "end": None, "bars": 3000, "seed": 42, "base_timeframe": None,
+                     "cache": True, "cache_dir": "./data/cache"},
+            "portfolio": {"symbols": ["EURUSD"], "overrides": {}},
+            "llm": {"max_concurrency": 4, "timeout": 30, "retries": 2,
+                    "cache": True, "cache_path": "./data/cache/explanations.sqlite", "cache_ttl": 604800,
+                    "cache_max_entries": 10000, "cache_sig_digits": 4},
+            "api": {"host": "127.0.0.1", "port": 8000, "cors_origins": ["*"], "signals_cache": True, "signals_cache_ttl": 300,
+                    "scheduler": True, "signals_max_concurrency": 8, "signals_timeout": 20,
+                    "snapshot_max_bars": 2, "stream_queue": 16, "stream_heartbeat": 15},
+            "instrument": {"enabled": False, "log_spans": True, "profile_dir": None},
             "flags": {"enable_live": False, "paper_only": True}
         }
         return _CFG
@@ -9,10 +9,12 @@ if __package__ is None or __package__ == "":
         sys.path.insert(0, _SRC)
 # ---------------
 
+import math
 import numpy as np
 import pandas as pd
-from typing import Literal
+from typing import Callable, Literal
 from mvpfx.config import get_cfg
+from mvpfx.instrument import timed
 
 TF = Literal["M1", "M5", "M15", "H1"]
 
@@ -34,7 +36,48 @@ def simulate_ohlcv(bars: int, timeframe: TF, seed: int = 42) -> pd.DataFrame:
     df = pd.DataFrame({"open":open_, "high":high, "low":low, "close":close, "volume":vol_ticks}, index=idx)
     return df
 
-def fetch_yfinance(symbol: str, timeframe: TF, bars: int = 3000) -> pd.DataFrame:
+class SimulatedFeed:
+    """
+    Fuente simulada "en vivo": genera barras cerradas hasta la hora de `clock`.
+
+    Las barras ya emitidas no cambian entre llamadas (el generador continúa donde lo dejó),
+    así que se puede pedir solo lo posterior a `since` como con un proveedor real.
+    """
+
+    def __init__(self, timeframe: TF, bars: int = 300, seed: int = 42, clock: Callable[[], float] | None = None):
+        import time
+        self.step = timeframe_to_minutes(timeframe) * 60
+        self.clock = clock or time.time
+        self.rng = np.random.default_rng(seed)
+        last = self._last_closed()
+        idx = pd.date_range(end=pd.Timestamp(last, unit="s", tz="UTC"), periods=bars, freq=f"{self.step}s")
+        self.df = self._bars(idx, 1.08)
+
+    def _last_closed(self) -> int:
+        # Apertura de la última barra cerrada
+        return int(self.clock() // self.step) * self.step - self.step
+
+    def _bars(self, idx: pd.DatetimeIndex, prev_close: float) -> pd.DataFrame:
+        n = len(idx)
+        rng = self.rng
+        vol = rng.lognormal(mean=-5.0, sigma=0.25, size=n)
+        close = np.clip(prev_close + np.cumsum(rng.normal(0, vol)), 1.01, 1.20)
+        open_ = np.r_[prev_close, close[:-1]]
+        high = np.maximum(open_, close) + np.abs(rng.normal(0, vol/2))
+        low = np.minimum(open_, close) - np.abs(rng.normal(0, vol/2))
+        return pd.DataFrame({"open":open_, "high":high, "low":low, "close":close,
+                             "volume":rng.integers(50, 500, size=n)}, index=idx)
+
+    def __call__(self, since: pd.Timestamp | None = None) -> pd.DataFrame:
+        last = self._last_closed()
+        have = int(self.df.index[-1].timestamp())
+        if last > have:
+            idx = pd.date_range(pd.Timestamp(have + self.step, unit="s", tz="UTC"),
+                                pd.Timestamp(last, unit="s", tz="UTC"), freq=f"{self.step}s")
+            self.df = pd.concat([self.df, self._bars(idx, float(self.df["close"].iloc[-1]))])
+        return self.df if since is None else self.df[self.df.index >= since]
+
+def fetch_yfinance(symbol: str, timeframe: TF, bars: int = 3000, timeout: float = 10) -> pd.DataFrame:
     """
     Obtiene datos OHLCV usando yfinance (Yahoo Finance).
     
@@ -42,6 +85,7 @@ def fetch_yfinance(symbol: str, timeframe: TF, bars: int = 3000) -> pd.DataFrame
         symbol: Símbolo del instrumento (ej: "EURUSD=X" para Forex, "AAPL" para acciones)
         timeframe: M1, M5, M15, H1
         bars: Número de barras a descargar
+        timeout: Segundos máximos de la petición HTTP
     
     Returns:
         DataFrame con índice timestamp y columnas [open, high, low, close, volume]
@@ -88,7 +132,7 @@ def fetch_yfinance(symbol: str, timeframe: TF, bars: int = 3000) -> pd.DataFrame
     
     # Descargar datos
     ticker = yf.Ticker(yf_symbol)
-    df = ticker.history(period=period_str, interval=interval)
+    df = ticker.history(period=period_str, interval=interval, timeout=timeout)
     
     if df.empty:
         raise ValueError(f"No se obtuvieron datos para {yf_symbol} con intervalo {interval}")
@@ -109,20 +153,112 @@ def fetch_yfinance(symbol: str, timeframe: TF, bars: int = 3000) -> pd.DataFrame
     
     return df
 
-def load_data() -> pd.DataFrame:
-    cfg = get_cfg()
+def dedupe_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """Elimina timestamps duplicados (gana la última barra) y ordena por tiempo."""
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+BAR_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+class BarCache:
+    """
+    Caché local de barras OHLCV por (source, symbol, timeframe) en ficheros NPZ columnares.
+
+    `get` carga lo cacheado, pide al `fetch` solo lo posterior a la última barra
+    guardada (incluida, por si estaba incompleta), fusiona y persiste. Con `bars` se
+    guardan y devuelven solo las últimas `bars`. Si lo nuevo no llega hasta la última
+    barra guardada (el `fetch` pidió la ventana completa), la caché se descarta en lugar
+    de fusionar dejando un hueco.
+    """
+
+    def __init__(self, root: str | None = None):
+        if root is None:
+            root = get_cfg()["data"].get("cache_dir", "./data/cache")
+        self.root = root
+
+    def path(self, source: str, symbol: str, timeframe: str) -> str:
+        safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in symbol.upper())
+        return os.path.join(self.root, f"{source}_{safe}_{timeframe.upper()}.npz")
+
+    def load(self, source: str, symbol: str, timeframe: str) -> pd.DataFrame | None:
+        path = self.path(source, symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as z:
+            idx = pd.DatetimeIndex(z["timestamp"], tz="UTC")
+            return pd.DataFrame({k: z[k] for k in BAR_COLUMNS if k in z.files}, index=idx)
+
+    def save(self, source: str, symbol: str, timeframe: str, df: pd.DataFrame) -> None:
+        path = self.path(source, symbol, timeframe)
+        os.makedirs(self.root, exist_ok=True)
+        cols = {k: df[k].to_numpy(dtype=np.float64) for k in BAR_COLUMNS if k in df}
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, timestamp=df.index.tz_convert("UTC").as_unit("ns").asi8, **cols)
+        os.replace(tmp, path)
+
+    def get(self, source: str, symbol: str, timeframe: str,
+            fetch: Callable[[pd.Timestamp | None], pd.DataFrame], bars: int | None = None) -> pd.DataFrame:
+        cached = self.load(source, symbol, timeframe)
+        since = cached.index[-1] if cached is not None and len(cached) else None
+        new = fetch(since)
+        if cached is not None and new is not None and len(new):
+            if new.index[0] > since:
+                cached = None
+            else:
+                new = new[new.index >= since]
+        parts = [x for x in (cached, new) if x is not None and len(x)]
+        if not parts:
+            raise ValueError(f"Sin datos para {source}:{symbol}:{timeframe}")
+        df = dedupe_bars(pd.concat(parts)[[k for k in BAR_COLUMNS if k in parts[-1]]])
+        if bars:
+            df = df.iloc[-bars:]
+        if new is not None and len(new):
+            self.save(source, symbol, timeframe, df)
+        return df
+
+def bars_since(since: pd.Timestamp, timeframe: str, now: pd.Timestamp | None = None) -> int:
+    """Barras (incluida la de `since`) que cubren el hueco hasta `now`."""
+    now = now or pd.Timestamp.now(tz="UTC")
+    return max(1, math.ceil((now - since) / pd.Timedelta(minutes=timeframe_to_minutes(timeframe))) + 1)
+
+def fetch_yfinance_cached(symbol: str, timeframe: TF, bars: int = 3000, cache: BarCache | None = None,
+                          timeout: float = 10) -> pd.DataFrame:
+    """`fetch_yfinance` con caché incremental: solo descarga las barras posteriores a la última guardada."""
+    cache = cache or BarCache()
+    def fetch(since):
+        # Hueco mayor que la ventana: se pide la ventana completa (BarCache descarta lo cacheado)
+        gap = bars if since is None else bars_since(since, timeframe)
+        return fetch_yfinance(symbol, timeframe, bars if gap > bars else gap, timeout)
+    return cache.get("yfinance", symbol, timeframe, fetch, bars)
+
+@timed("data.load")
+def load_data(cfg: dict | None = None) -> pd.DataFrame:
+    if cfg is None:
+        cfg = get_cfg()
     src = cfg["data"]["source"]
-    tf = cfg["timeframe"]
+    # data.base_timeframe (p.ej. "M1"): se descarga una sola serie base y se agrega a `timeframe`;
+    # data.bars sigue contando barras de `timeframe`, así que se piden `ratio` veces más barras base
+    tf = cfg["data"].get("base_timeframe") or cfg["timeframe"]
+    ratio, rem = divmod(timeframe_to_minutes(cfg["timeframe"]), timeframe_to_minutes(tf))
+    if ratio < 1 or rem:
+        raise ValueError(f"data.base_timeframe {tf} no divide a timeframe {cfg['timeframe']}")
+    bars = cfg["data"].get("bars", 3000)
     if src == "simulated":
-        df = simulate_ohlcv(cfg["data"]["bars"], tf, cfg["data"]["seed"])
+        df = simulate_ohlcv(bars * ratio, tf, cfg["data"]["seed"])
     elif src == "csv":
         path = cfg["data"]["csv_path"]
         df = pd.read_csv(path, parse_dates=["timestamp"]).set_index("timestamp")
         df = df.tz_localize("UTC") if df.index.tz is None else df.tz_convert("UTC")
+    elif src == "barstore":
+        from mvpfx.barstore import open_bar_store
+        d = cfg["data"]
+        df = open_bar_store(d["store_path"], d.get("start"), d.get("end"))
     elif src == "yfinance":
         symbol = cfg["symbol"]
-        bars = cfg["data"].get("bars", 3000)
-        df = fetch_yfinance(symbol, tf, bars)
+        if cfg["data"].get("cache", False):
+            df = fetch_yfinance_cached(symbol, tf, bars * ratio, BarCache(cfg["data"].get("cache_dir")))
+        else:
+            df = fetch_yfinance(symbol, tf, bars * ratio)
     elif src == "ib":
         # Import lazy para evitar problemas de event loop en FastAPI
         import asyncio
@@ -133,24 +269,39 @@ def load_data() -> pd.DataFrame:
             except RuntimeError:
                 asyncio.set_event_loop(asyncio.new_event_loop())
         from mvpfx.broker_ib import get_historical_bars
-        df = get_historical_bars(symbol=cfg["symbol"], timeframe=tf)
+        if cfg["data"].get("cache", False):
+            def fetch(since):
+                # Sin caché o con un hueco mayor que data.bars: ventana completa
+                if since is None or bars_since(since, tf) > bars * ratio:
+                    return get_historical_bars(symbol=cfg["symbol"], timeframe=tf)
+                secs = int((pd.Timestamp.now(tz="UTC") - since).total_seconds()) + 60 * timeframe_to_minutes(tf)
+                duration = f"{secs} S" if secs < 86400 else f"{math.ceil(secs / 86400)} D"
+                return get_historical_bars(symbol=cfg["symbol"], timeframe=tf, duration=duration)
+            df = BarCache(cfg["data"].get("cache_dir")).get("ib", cfg["symbol"], tf, fetch, bars * ratio)
+        else:
+            df = get_historical_bars(symbol=cfg["symbol"], timeframe=tf).iloc[-bars * ratio:]
     else:
         raise ValueError(f"data.source desconocido: {src}")
-    df = df[["open","high","low","close"]].join(df.get("volume"))
-    df = df[~df.index.duplicated(keep="last")].sort_index()
+    df = dedupe_bars(df[["open","high","low","close"]].join(df.get("volume")))
+    if tf != cfg["timeframe"]:
+        from mvpfx.resample import resample_ohlcv
+        df = resample_ohlcv(df, cfg["timeframe"])
+        if src in ("simulated", "yfinance", "ib"):
+            # Una barra inicial incompleta (serie base no alineada al periodo) deja una de más
+            df = df.iloc[-bars:]
     return df
 
 if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser(description="Preview/Export OHLCV")
-    p.add_argument("--source", choices=["simulated","csv","ib","yfinance"], help="Override data.source")
+    p.add_argument("--source", choices=["simulated","csv","barstore","ib","yfinance"], help="Override data.source")
     p.add_argument("--bars", type=int, help="Override bars for simulated")
     p.add_argument("--out", type=str, help="Ruta CSV de salida")
     args = p.parse_args()
     cfg = get_cfg()
     if args.source: cfg["data"]["source"] = args.source
     if args.bars: cfg["data"]["bars"] = args.bars
-    df = load_data()
+    df = load_data(cfg)
     print(df.head())
     print(df.tail(3))
     if args.out:
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+def normalize(value, sig_digits: int = 4):
+    """Redondea floats (a `sig_digits` cifras significativas) dentro de dicts/listas anidados."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float) or hasattr(value, "dtype"):
+        return float(f"{float(value):.{sig_digits}g}")
+    if isinstance(value, dict):
+        return {str(k): normalize(v, sig_digits) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v, sig_digits) for v in value]
+    return value
+
+def content_key(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class ExplanationCache:
+    """
+    Caché persistente de explicaciones: LRU en memoria delante de una tabla SQLite.
+
+    Las entradas caducan a los `ttl` segundos (None = nunca) y, por encima de
+    `max_entries`, se expulsan las de uso más antiguo (en memoria y en disco).
+    `path=None` deja solo la capa en memoria.
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int = 10_000, ttl: float | None = None,
+                 memory_entries: int = 1024, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._lru: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS explanations ("
+                             "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, used REAL NOT NULL)")
+            self._db.commit()
+        self.hits = self.misses = 0
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created >= self.ttl
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            now = self.clock()
+            entry = self._lru.get(key)
+            from_disk = entry is None and self._db is not None
+            if from_disk:
+                row = self._db.execute("SELECT created, value FROM explanations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+            if entry is None or self._expired(entry[0], now):
+                if entry is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            if from_disk:
+                # Los aciertos en memoria no tocan el disco; el uso se registra al promocionar
+                self._db.execute("UPDATE explanations SET used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: dict) -> None:
+        with self._lock:
+            now = self.clock()
+            self._remember(key, (now, value))
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?)",
+                                 (key, json.dumps(value, ensure_ascii=False), now, now))
+                self._evict_db()
+                self._db.commit()
+
+    def _remember(self, key: str, entry: tuple[float, dict]) -> None:
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        cap = self.max_entries if self._db is None else min(self.memory_entries, self.max_entries)
+        while len(self._lru) > cap:
+            self._lru.popitem(last=False)
+
+    def _delete(self, key: str) -> None:
+        self._lru.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM explanations WHERE key = ?", (key,))
+            self._db.commit()
+
+    def _evict_db(self) -> None:
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM explanations WHERE created <= ?", (self.clock() - self.ttl,))
+        self._db.execute("DELETE FROM explanations WHERE key IN (SELECT key FROM explanations "
+                         "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._db is None:
+                return len(self._lru)
+            return self._db.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM explanations")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        entries = len(self)
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "entries": entries,
+                    "memory_entries": len(self._lru), "hit_rate": self.hits / total if total else 0.0}
@@ -9,10 +9,12 @@ if __package__ is None or __package__ == "":
         sys.path.insert(0, _SRC)
 # ---------------
 
+import math
 import pandas as pd
 import numpy as np
+from collections import deque
 from mvpfx.config import get_cfg
-from mvpfx.data import load_data
+from mvpfx.instrument import timed
 
 def ema(series: pd.Series, period: int) -> pd.Series:
     return series.ewm(span=period, adjust=False).mean()
@@ -24,13 +26,15 @@ def rsi(close: pd.Series, period: int = 14) -> pd.Series:
     rs = gain / (loss.replace(0, np.nan))
     return (100 - 100/(1+rs)).fillna(50.0)
 
-def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
-    ef, es = ema(close, fast), ema(close, slow)
+def macd_from_ema(ef: pd.Series, es: pd.Series, signal: int = 9):
     line = ef - es
     sig = line.ewm(span=signal, adjust=False).mean()
     hist = line - sig
     return line, sig, hist
 
+def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
+    return macd_from_ema(ema(close, fast), ema(close, slow), signal)
+
 def true_range(h: pd.Series, l: pd.Series, c: pd.Series) -> pd.Series:
     pc = c.shift(1)
     return pd.concat([(h-l), (h-pc).abs(), (l-pc).abs()], axis=1).max(axis=1)
@@ -46,29 +50,216 @@ def bollinger(c: pd.Series, period: int = 20, k: float = 2.0):
 def tick_volume(v: pd.Series | None) -> pd.Series:
     return (v.astype(float) if v is not None else pd.Series(1.0, index=None))
 
-def compute_all_indicators(df: pd.DataFrame, cfg: dict) -> pd.DataFrame:
+INDICATOR_COLS = ("ema_fast", "ema_slow", "rsi", "macd", "macd_signal", "macd_hist",
+                  "atr", "bb_mid", "bb_upper", "bb_lower", "tick_volume")
+
+def indicator_columns(df: pd.DataFrame, cfg: dict, reuse: dict | None = None):
+    """
+    Genera (nombre, serie) para cada columna de INDICATOR_COLS, una a una.
+
+    Quien consume decide dónde escribirlas (un DataFrame o el buffer de `mvpfx.features`);
+    los temporales de cada indicador se liberan antes de calcular el siguiente.
+    """
+    # reuse: columnas ya calculadas con los mismos parámetros (p.ej. ema_*/macd*/atr/rsi/bb_* en un barrido)
+    reuse = reuse or {}
+    ind = cfg["indicators"]
     c = df["close"]
-    ef = ema(c, cfg["indicators"]["ema_fast"])
-    es = ema(c, cfg["indicators"]["ema_slow"])
-    r = rsi(c, cfg["indicators"]["rsi_period"])
-    m, ms, mh = macd(c, cfg["indicators"]["ema_fast"], cfg["indicators"]["ema_slow"], cfg["indicators"]["macd_signal"])
-    a = atr(df["high"], df["low"], c, cfg["indicators"]["atr_period"])
-    bbm, bbu, bbl = bollinger(c, cfg["indicators"]["bb_period"], cfg["indicators"]["bb_k"])
-    vol = tick_volume(df.get("volume"))
+    ef = reuse["ema_fast"] if "ema_fast" in reuse else ema(c, ind["ema_fast"])
+    es = reuse["ema_slow"] if "ema_slow" in reuse else ema(c, ind["ema_slow"])
+    yield "ema_fast", ef
+    yield "ema_slow", es
+    yield "rsi", reuse["rsi"] if "rsi" in reuse else rsi(c, ind["rsi_period"])
+    if "macd" in reuse:
+        m, ms = reuse["macd"], reuse["macd_signal"]
+        mh = m - ms
+    else:
+        m, ms, mh = macd_from_ema(ef, es, ind["macd_signal"])
+    del ef, es
+    yield "macd", m
+    yield "macd_signal", ms
+    yield "macd_hist", mh
+    del m, ms, mh
+    yield "atr", reuse["atr"] if "atr" in reuse else atr(df["high"], df["low"], c, ind["atr_period"])
+    if "bb_mid" in reuse:
+        bbm, bbu, bbl = reuse["bb_mid"], reuse["bb_upper"], reuse["bb_lower"]
+    else:
+        bbm, bbu, bbl = bollinger(c, ind["bb_period"], ind["bb_k"])
+    yield "bb_mid", bbm
+    yield "bb_upper", bbu
+    yield "bb_lower", bbl
+    del bbm, bbu, bbl
+    vol = df.get("volume")
+    yield "tick_volume", tick_volume(vol) if vol is not None else pd.Series(1.0, index=df.index)
+
+@timed("indicators")
+def compute_all_indicators(df: pd.DataFrame, cfg: dict, reuse: dict | None = None) -> pd.DataFrame:
     out = df.copy()
-    out["ema_fast"], out["ema_slow"], out["rsi"] = ef, es, r
-    out["macd"], out["macd_signal"], out["macd_hist"] = m, ms, mh
-    out["atr"], out["bb_mid"], out["bb_upper"], out["bb_lower"] = a, bbm, bbu, bbl
-    out["tick_volume"] = vol
+    for name, values in indicator_columns(df, cfg, reuse):
+        out[name] = values
     return out
 
+class _EWM:
+    """Paso a paso de `Series.ewm(span|alpha, adjust=False).mean()` con el mismo redondeo que pandas."""
+    __slots__ = ("alpha", "factor", "old_wt", "value")
+
+    def __init__(self, span: float | None = None, alpha: float | None = None):
+        com = (span - 1) / 2 if span is not None else (1 - alpha) / alpha
+        self.alpha = 1.0 / (1.0 + com)
+        self.factor = 1.0 - self.alpha
+        self.old_wt = 1.0
+        self.value = np.nan
+
+    def update(self, x: float) -> float:
+        w = self.value
+        if w == w:
+            self.old_wt *= self.factor
+            if x == x:
+                if w != x:
+                    w = (self.old_wt * w + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif x == x:
+            w = x
+        self.value = w
+        return w
+
+class _RollingMeanStd:
+    """
+    Media y desviación (ddof=0) sobre una ventana deslizante.
+
+    La media replica `rolling().mean()` (suma compensada de Kahan) y es exacta. La desviación
+    usa el mismo Welford con compensación de Kahan que `rolling().std()`, pero pandas reajusta
+    su estado interno tras rachas de valores idénticos de forma no documentada (y distinta
+    entre versiones): tras esas rachas difiere en ~1e-8.
+    """
+    __slots__ = ("period", "window", "sum", "comp_add", "comp_rem", "neg", "same", "prev",
+                 "mean", "ssqdm", "vcomp_add", "vcomp_rem")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.sum = self.comp_add = self.comp_rem = 0.0
+        self.neg = self.same = 0
+        self.prev = np.nan
+        self.mean = self.ssqdm = self.vcomp_add = self.vcomp_rem = 0.0
+
+    def update(self, x: float) -> tuple[float, float]:
+        if len(self.window) == self.period:
+            old = self.window.popleft()
+            y = -old - self.comp_rem
+            t = self.sum + y
+            self.comp_rem = t - self.sum - y
+            self.sum = t
+            self.neg -= old < 0
+            n = len(self.window)
+            if n:
+                prev_mean = self.mean - self.vcomp_rem
+                y = old - self.vcomp_rem
+                t = y - self.mean
+                self.vcomp_rem = t + self.mean - y
+                self.mean -= t / n
+                self.ssqdm -= (old - prev_mean) * (old - self.mean)
+            else:
+                self.mean = self.ssqdm = 0.0
+        self.window.append(x)
+        n = len(self.window)
+        y = x - self.comp_add
+        t = self.sum + y
+        self.comp_add = t - self.sum - y
+        self.sum = t
+        self.neg += x < 0
+        self.same = self.same + 1 if x == self.prev else 1
+        self.prev = x
+        prev_mean = self.mean - self.vcomp_add
+        y = x - self.vcomp_add
+        t = y - self.mean
+        self.vcomp_add = t + self.mean - y
+        self.mean += t / n
+        self.ssqdm = max(self.ssqdm + (x - prev_mean) * (x - self.mean), 0.0)
+        if n < self.period:
+            return np.nan, np.nan
+        if self.same >= n:
+            mid = x
+        else:
+            mid = self.sum / n
+            if (self.neg == 0 and mid < 0) or (self.neg == n and mid > 0):
+                mid = 0.0
+        return mid, math.sqrt(self.ssqdm / n)
+
+class IndicatorState:
+    """
+    Estado incremental de los indicadores de `compute_all_indicators`.
+
+    `update(bar)` calcula solo la nueva barra en O(1). EMA, MACD, ATR, RSI y bb_mid
+    reproducen bit a bit las funciones batch; bb_upper/bb_lower coinciden a tolerancia de coma flotante.
+    """
+
+    def __init__(self, cfg: dict | None = None):
+        if cfg is None:
+            cfg = get_cfg()
+        ind = self.ind = cfg["indicators"]
+        self.ema_fast = _EWM(span=ind["ema_fast"])
+        self.ema_slow = _EWM(span=ind["ema_slow"])
+        self.macd_signal = _EWM(span=ind["macd_signal"])
+        self.gain = _EWM(alpha=1 / ind["rsi_period"])
+        self.loss = _EWM(alpha=1 / ind["rsi_period"])
+        self.atr = _EWM(span=ind["atr_period"])
+        self.bb = _RollingMeanStd(ind["bb_period"])
+        self.bb_k = ind["bb_k"]
+        self.prev_close = np.nan
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, cfg: dict | None = None) -> "IndicatorState":
+        """Inicializa el estado a partir de un histórico; las EMAs se siembran con las series batch."""
+        st = cls(cfg)
+        if len(df) == 0:
+            return st
+        ind = st.ind
+        c = df["close"]
+        delta = c.diff()
+        ef, es = ema(c, ind["ema_fast"]), ema(c, ind["ema_slow"])
+        for ewm, series in ((st.ema_fast, ef), (st.ema_slow, es),
+                            (st.macd_signal, ema(ef - es, ind["macd_signal"])),
+                            (st.gain, delta.clip(lower=0).ewm(alpha=1/ind["rsi_period"], adjust=False).mean()),
+                            (st.loss, (-delta.clip(upper=0)).ewm(alpha=1/ind["rsi_period"], adjust=False).mean()),
+                            (st.atr, atr(df["high"], df["low"], c, ind["atr_period"]))):
+            ewm.value = float(series.iloc[-1])
+        # La suma compensada depende de toda la historia: se reproduce entera para que bb_mid sea exacta
+        for x in c.to_numpy(dtype=np.float64).tolist():
+            st.bb.update(x)
+        st.prev_close = float(c.iloc[-1])
+        return st
+
+    def update(self, bar) -> dict:
+        h, l, c = float(bar["high"]), float(bar["low"]), float(bar["close"])
+        pc = self.prev_close
+        ef = self.ema_fast.update(c)
+        es = self.ema_slow.update(c)
+        line = ef - es
+        sig = self.macd_signal.update(line)
+        delta = c - pc
+        gain = self.gain.update(max(delta, 0.0) if delta == delta else np.nan)
+        loss = self.loss.update(-min(delta, 0.0) if delta == delta else np.nan)
+        r = 100 - 100 / (1 + gain / loss) if loss == loss and loss != 0 else np.nan
+        tr = h - l if pc != pc else max(h - l, abs(h - pc), abs(l - pc))
+        a = self.atr.update(tr)
+        mid, std = self.bb.update(c)
+        vol = bar.get("volume") if hasattr(bar, "get") else None
+        self.prev_close = c
+        return {
+            "ema_fast": ef, "ema_slow": es, "rsi": 50.0 if r != r else r,
+            "macd": line, "macd_signal": sig, "macd_hist": line - sig,
+            "atr": a, "bb_mid": mid, "bb_upper": mid + self.bb_k * std, "bb_lower": mid - self.bb_k * std,
+            "tick_volume": float(vol) if vol is not None else 1.0,
+        }
+
 if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser(description="Calcular indicadores y exportar")
     p.add_argument("--out", type=str, help="Ruta CSV salida con indicadores")
     args = p.parse_args()
+    from mvpfx.data import load_data
     cfg = get_cfg()
-    df = load_data()
+    df = load_data(cfg)
     feats = compute_all_indicators(df, cfg)
     print(feats[["close","ema_fast","ema_slow","rsi","macd","macd_signal","atr"]].tail(5))
     if args.out:
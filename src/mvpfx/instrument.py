@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from mvpfx.config import get_cfg
+from mvpfx.logging_utils import get_logger
+
+# Límites superiores (ms) de los buckets del histograma
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+_inst_cfg = get_cfg().get("instrument", {})
+_state = {"enabled": os.getenv("MVPFX_INSTRUMENT", str(_inst_cfg.get("enabled", False))).lower() in ("1", "true"),
+          "log": _inst_cfg.get("log_spans", True)}
+_lock = threading.Lock()
+_hist: dict[str, "Histogram"] = {}
+
+def enable(flag: bool = True, log: bool | None = None) -> None:
+    _state["enabled"] = flag
+    if log is not None:
+        _state["log"] = log
+
+def enabled() -> bool:
+    return _state["enabled"]
+
+class Histogram:
+    """Histograma de duraciones (ms) con buckets fijos + contadores de filas y aciertos de caché."""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, ms: float, rows: int | None, cache_hit: bool | None) -> None:
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows or 0
+        if cache_hit is not None:
+            if cache_hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def quantile(self, q: float) -> float:
+        """Cota superior del bucket que contiene el cuantil `q`."""
+        target, acc = q * self.count, 0
+        for bound, c in zip(BUCKETS_MS, self.buckets):
+            acc += c
+            if acc >= target and c:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {"count": self.count, "total_ms": self.total_ms,
+                "mean_ms": self.total_ms / self.count if self.count else 0.0,
+                "p50_ms": self.quantile(0.5), "p95_ms": self.quantile(0.95), "max_ms": self.max_ms,
+                "rows": self.rows, "cache_hits": self.cache_hits, "cache_misses": self.cache_misses,
+                "buckets": {("+Inf" if b == float("inf") else str(b)): c for b, c in zip(BUCKETS_MS, self.buckets)}}
+
+class Span:
+    __slots__ = ("name", "fields", "rows", "cache_hit")
+
+    def __init__(self, name: str, fields: dict):
+        self.name, self.fields = name, fields
+        self.rows = self.cache_hit = None
+
+    def set(self, rows: int | None = None, cache_hit: bool | None = None, **fields) -> None:
+        if rows is not None:
+            self.rows = int(rows)
+        if cache_hit is not None:
+            self.cache_hit = bool(cache_hit)
+        self.fields.update(fields)
+
+class _NullSpan:
+    __slots__ = ()
+    def set(self, *args, **kwargs) -> None:
+        pass
+
+_NULL = _NullSpan()
+
+@contextmanager
+def _span(name: str, fields: dict):
+    sp = Span(name, fields)
+    t0 = time.perf_counter()
+    error = None
+    try:
+        yield sp
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        ms = (time.perf_counter() - t0) * 1e3
+        with _lock:
+            h = _hist.get(name)
+            if h is None:
+                h = _hist[name] = Histogram()
+            h.add(ms, sp.rows, sp.cache_hit)
+        if _state["log"]:
+            extra = {"span": name, "ms": round(ms, 3), **sp.fields}
+            if sp.rows is not None:
+                extra["rows"] = sp.rows
+            if sp.cache_hit is not None:
+                extra["cache_hit"] = sp.cache_hit
+            if error:
+                extra["error"] = error
+            get_logger("mvpfx.spans").info("span", extra=extra)
+
+@contextmanager
+def _null():
+    yield _NULL
+
+def span(name: str, **fields):
+    """
+    `with span("data.fetch", symbol=s) as sp: ...; sp.set(rows=len(df))`.
+
+    Desactivado devuelve un contexto vacío (sin reloj, sin logs, sin histograma).
+    """
+    return _span(name, fields) if _state["enabled"] else _null()
+
+def timed(name: str):
+    """Decorador: span con `rows=len(resultado)` si el resultado tiene longitud."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state["enabled"]:
+                return fn(*args, **kwargs)
+            with _span(name, {}) as sp:
+                out = fn(*args, **kwargs)
+                if hasattr(out, "__len__"):
+                    sp.set(rows=len(out))
+                return out
+        return wrapper
+    return deco
+
+def metrics() -> dict:
+    with _lock:
+        return {name: h.snapshot() for name, h in sorted(_hist.items())}
+
+def reset() -> None:
+    with _lock:
+        _hist.clear()
+
+@contextmanager
+def profile(mode: str, path: str, top: int = 30):
+    """
+    Volcado opt-in de una ejecución: `mode="cprofile"` guarda `path` (.prof, para pstats/snakeviz);
+    `mode="tracemalloc"` guarda en `path` el top de asignaciones por línea y el pico.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if mode == "cprofile":
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield path
+        finally:
+            prof.disable()
+            prof.dump_stats(path)
+    elif mode == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield path
+        finally:
+            snap = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"peak_mb {peak / 2**20:.2f}\n")
+                for stat in snap.statistics("lineno")[:top]:
+                    f.write(f"{stat}\n")
+    else:
+        raise ValueError(f"Modo de profiling desconocido: {mode}")
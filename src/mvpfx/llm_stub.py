@@ -10,43 +10,63 @@ if __package__ is None or __package__ == "":
 # ---------------
 
 import json
-import google.generativeai as genai
-from dotenv import load_dotenv
+import asyncio
+import threading
+from mvpfx.config import get_cfg
+from mvpfx.explain_cache import ExplanationCache, normalize, content_key
+from mvpfx.instrument import span
 
-load_dotenv()
+# Cliente Gemini: se crea en el primer uso (el SDK tarda ~1 s en importarse)
+_UNSET = object()
+model = _UNSET
+_model_lock = threading.Lock()
 
-# Configurar Google AI Studio
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if GOOGLE_API_KEY and GOOGLE_API_KEY != "tu_api_key_aqui":
-    genai.configure(api_key=GOOGLE_API_KEY)
-    # Probar con diferentes nombres de modelo disponibles
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
-    except:
-        try:
-            model = genai.GenerativeModel('gemini-pro')
-        except:
+def get_model():
+    """Modelo Gemini configurado con GOOGLE_API_KEY, o None si no hay clave (texto por defecto)."""
+    global model
+    if model is not _UNSET:
+        return model
+    with _model_lock:
+        if model is not _UNSET:
+            return model
+        from dotenv import load_dotenv
+        load_dotenv()
+        # Configurar Google AI Studio
+        GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+        if GOOGLE_API_KEY and GOOGLE_API_KEY != "tu_api_key_aqui":
+            import google.generativeai as genai
+            genai.configure(api_key=GOOGLE_API_KEY)
+            # Probar con diferentes nombres de modelo disponibles
+            try:
+                model = genai.GenerativeModel('gemini-1.5-flash-latest')
+            except:
+                try:
+                    model = genai.GenerativeModel('gemini-pro')
+                except:
+                    model = None
+        else:
             model = None
-else:
-    model = None
+    return model
 
-def explain_trade(strategy: str, signal: str, indicators: dict, risk: dict, confidence: float):
-    rationale = {
+def _rationale(strategy: str, signal: str, indicators: dict, risk: dict, confidence: float) -> dict:
+    return {
         "strategy": strategy, "signal": signal, "indicators": indicators,
         "risk": risk, "confidence": round(float(confidence), 2),
         "checklist": ["Cruce EMA", "RSI coherente", "MACD confirma", "ATR suficiente y régimen tendencial"],
         "caveats": ["Evitar noticias de alto impacto", "Spread anormal"]
     }
-    
-    # Si no hay API key configurada, usar texto por defecto
-    if model is None:
-        text = (f"Se propone {signal} con confianza {rationale['confidence']}. "
-                "EMAs y MACD alineados; RSI en zona coherente. "
-                "Riesgo controlado por fracción fija y SL/TP basados en ATR.")
-        return {"json": rationale, "text": text}
-    
-    # Usar Google Gemini para generar explicación
-    prompt = f"""
+
+def _default_text(signal: str, rationale: dict) -> str:
+    return (f"Se propone {signal} con confianza {rationale['confidence']}. "
+            "EMAs y MACD alineados; RSI en zona coherente. "
+            "Riesgo controlado por fracción fija y SL/TP basados en ATR.")
+
+def _error_text(signal: str, rationale: dict, e: BaseException) -> str:
+    return (f"Se propone {signal} con confianza {rationale['confidence']}. "
+            f"EMAs y MACD alineados; RSI en zona coherente. [Error LLM: {str(e) or type(e).__name__}]")
+
+def _prompt(strategy: str, signal: str, indicators: dict, risk: dict, confidence: float) -> str:
+    return f"""
 Eres un analista de trading experto. Explica esta señal de trading de forma clara y educativa:
 
 **Estrategia**: {strategy}
@@ -66,17 +86,118 @@ Proporciona:
 
 Responde en español, máximo 150 palabras, tono educativo.
 """
+
+_CACHE: ExplanationCache | None = None
+
+def get_cache() -> ExplanationCache | None:
+    """Caché de explicaciones compartida según `llm.cache*` en config (None si está desactivada)."""
+    global _CACHE
+    llm_cfg = get_cfg().get("llm", {})
+    if not llm_cfg.get("cache", False):
+        return None
+    if _CACHE is None:
+        _CACHE = ExplanationCache(llm_cfg.get("cache_path", "./data/cache/explanations.sqlite"),
+                                  max_entries=llm_cfg.get("cache_max_entries", 10_000),
+                                  ttl=llm_cfg.get("cache_ttl"))
+    return _CACHE
+
+def cache_key(llm, strategy: str, signal: str, indicators: dict, risk: dict, confidence: float) -> str:
+    # Se hashea el prompt construido con las entradas redondeadas: cambiar la plantilla invalida la caché
+    digits = get_cfg().get("llm", {}).get("cache_sig_digits", 4)
+    prompt = _prompt(strategy, signal, normalize(indicators, digits), normalize(risk, digits),
+                     normalize(float(confidence), digits))
+    return content_key({"model": getattr(llm, "model_name", type(llm).__name__), "prompt": prompt})
+
+def explain_trade(strategy: str, signal: str, indicators: dict, risk: dict, confidence: float,
+                  cache: ExplanationCache | None = None):
+    rationale = _rationale(strategy, signal, indicators, risk, confidence)
+    model = get_model()
+    
+    # Si no hay API key configurada, usar texto por defecto
+    if model is None:
+        return {"json": rationale, "text": _default_text(signal, rationale)}
+    
+    # Explicación ya generada para las mismas entradas (redondeadas): sin llamada al LLM
+    cache = cache if cache is not None else get_cache()
+    key = cache_key(model, strategy, signal, indicators, risk, confidence) if cache is not None else None
+    hit = cache.get(key) if cache is not None else None
+    if hit is not None:
+        with span("llm.explain") as sp:
+            sp.set(cache_hit=True)
+        return {"json": rationale, "text": hit["text"]}
+    
+    # Usar Google Gemini para generar explicación
+    prompt = _prompt(strategy, signal, indicators, risk, confidence)
     
     try:
-        response = model.generate_content(prompt)
+        with span("llm.explain") as sp:
+            sp.set(cache_hit=False)
+            response = model.generate_content(prompt)
         text = response.text.strip()
     except Exception as e:
-        # Fallback si falla la API
-        text = (f"Se propone {signal} con confianza {rationale['confidence']}. "
-                f"EMAs y MACD alineados; RSI en zona coherente. [Error LLM: {str(e)}]")
+        # Fallback si falla la API (no se cachea)
+        return {"json": rationale, "text": _error_text(signal, rationale, e)}
     
+    if cache is not None:
+        cache.put(key, {"text": text})
     return {"json": rationale, "text": text}
 
+async def _generate(llm, prompt: str) -> str:
+    # El SDK de Gemini expone generate_content_async; si el modelo solo es síncrono, se usa un hilo
+    if hasattr(llm, "generate_content_async"):
+        response = await llm.generate_content_async(prompt)
+    else:
+        response = await asyncio.to_thread(llm.generate_content, prompt)
+    return response.text.strip()
+
+async def explain_trade_async(strategy: str, signal: str, indicators: dict, risk: dict, confidence: float,
+                              llm=None, timeout: float = 30.0, retries: int = 2, backoff: float = 0.5,
+                              cache: ExplanationCache | None = None) -> dict:
+    """`explain_trade` asíncrono con timeout por intento y reintentos con backoff exponencial."""
+    llm = llm if llm is not None else get_model()
+    rationale = _rationale(strategy, signal, indicators, risk, confidence)
+    if llm is None:
+        return {"json": rationale, "text": _default_text(signal, rationale)}
+    cache = cache if cache is not None else get_cache()
+    key = cache_key(llm, strategy, signal, indicators, risk, confidence) if cache is not None else None
+    hit = cache.get(key) if cache is not None else None
+    if hit is not None:
+        with span("llm.explain") as sp:
+            sp.set(cache_hit=True)
+        return {"json": rationale, "text": hit["text"]}
+    prompt = _prompt(strategy, signal, indicators, risk, confidence)
+    for attempt in range(retries + 1):
+        try:
+            with span("llm.explain", attempt=attempt) as sp:
+                sp.set(cache_hit=False)
+                text = await asyncio.wait_for(_generate(llm, prompt), timeout)
+            if cache is not None:
+                cache.put(key, {"text": text})
+            return {"json": rationale, "text": text}
+        except Exception as e:
+            if attempt == retries:
+                return {"json": rationale, "text": _error_text(signal, rationale, e)}
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+async def explain_trades_batch(items: list[dict], max_concurrency: int = 4, timeout: float = 30.0,
+                               retries: int = 2, backoff: float = 0.5, llm=None,
+                               cache: ExplanationCache | None = None) -> list[dict]:
+    """
+    Explica varias señales en paralelo con como mucho `max_concurrency` llamadas en vuelo.
+
+    `items` son los kwargs de `explain_trade`; el resultado mantiene el orden de entrada.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+    async def one(item: dict) -> dict:
+        async with sem:
+            return await explain_trade_async(**item, llm=llm, timeout=timeout, retries=retries,
+                                           backoff=backoff, cache=cache)
+    return await asyncio.gather(*(one(it) for it in items))
+
+def explain_trades(items: list[dict], **kwargs) -> list[dict]:
+    """Envoltorio síncrono de `explain_trades_batch` para scripts."""
+    return asyncio.run(explain_trades_batch(items, **kwargs))
+
 if __name__ == "__main__":
     out = explain_trade("EMA+RSI+MACD", "long",
                         {"ema_fast":12,"ema_slow":26,"rsi":60,"macd":0.0004},
@@ -8,13 +8,13 @@ if __package__ is None or __package__ == "":
 # ---------------
 
 import logging, sys as _sys
-from pythonjsonlogger import jsonlogger
 
 def get_logger(name: str = "mvpfx"):
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
     logger.setLevel(logging.INFO)
+    from pythonjsonlogger import jsonlogger
     handler = logging.StreamHandler(_sys.stdout)
     fmt = jsonlogger.JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s")
     handler.setFormatter(fmt)
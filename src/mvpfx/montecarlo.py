@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from mvpfx.config import get_cfg
+from mvpfx.instrument import span
+
+METHODS = ("bootstrap", "permute")
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+@dataclass
+class MonteCarloResult:
+    max_drawdown: np.ndarray      # por camino (<= 0)
+    terminal_equity: np.ndarray   # por camino
+    daily_limit_hit: np.ndarray   # bool por camino: algún día alcanza el límite de pérdida diaria
+    capital: float
+    ruin_drawdown: float
+
+    def summary(self, percentiles=PERCENTILES) -> dict:
+        pct = lambda a: {str(p): float(v) for p, v in zip(percentiles, np.percentile(a, percentiles))}
+        return {"Paths": int(len(self.terminal_equity)),
+                "MaxDrawdown": pct(self.max_drawdown),
+                "TerminalEquity": pct(self.terminal_equity),
+                "ProbLoss": float((self.terminal_equity < self.capital).mean()),
+                "ProbDailyLimit": float(self.daily_limit_hit.mean()),
+                "ProbRuin": float((self.max_drawdown <= -self.ruin_drawdown).mean())}
+
+def trade_returns(trades: pd.DataFrame, capital: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Retorno de cada operación cerrada sobre la equity previa y su día UTC (ids 0..k).
+
+    El sizing es un % de la equity (`risk_per_trade`), así que se remuestrean retornos y no PnL:
+    cada camino sintético recompone la equity con su propio orden de operaciones.
+    """
+    if trades is None or len(trades) == 0 or "pnl" not in trades:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    exits = trades[trades["type"] == "exit"]
+    pnl = exits["pnl"].to_numpy(dtype=np.float64)
+    before = capital + np.cumsum(pnl) - pnl
+    days = pd.DatetimeIndex(exits["time"]).normalize()
+    return pnl / before, pd.factorize(days)[0]
+
+def _paths(r: np.ndarray, rows: int, method: str, rng: np.random.Generator) -> np.ndarray:
+    # Matriz operaciones x caminos: cada paso de la acumulación es una operación vectorial contigua
+    n = len(r)
+    if method == "bootstrap":
+        return r[rng.integers(0, n, size=(n, rows))]
+    if method == "permute":
+        return rng.permuted(np.broadcast_to(r[:, None], (n, rows)), axis=0)
+    raise ValueError(f"método desconocido: {method}")
+
+def _chunk_stats(R: np.ndarray, day_start: np.ndarray, capital: float, loss_limit: float):
+    n, rows = R.shape
+    # Equity con el capital inicial como fila 0 (cuenta como primer máximo y como saldo previo)
+    E = np.empty((n + 1, rows))
+    E[0] = capital
+    R += 1.0
+    np.cumprod(R, axis=0, out=E[1:])
+    E[1:] *= capital
+    buf = np.maximum.accumulate(E, axis=0)
+    np.divide(E, buf, out=buf)
+    dd = buf.min(axis=0) - 1.0
+    # PnL acumulado dentro de cada día sobre el capital inicial (misma regla que DailyRiskLedger)
+    np.subtract(E[1:], E[day_start], out=buf[1:])
+    hit = (buf[1:] <= -loss_limit * capital).any(axis=0)
+    return dd, E[-1].copy(), hit
+
+def simulate_trades(r: np.ndarray, days: np.ndarray, cfg: dict | None = None, paths: int | None = None,
+                    method: str | None = None, seed: int | None = None, chunk_mb: float | None = None) -> MonteCarloResult:
+    """
+    Remuestrea los retornos por operación en `paths` caminos de equity (matriz operaciones x caminos).
+
+    `bootstrap` sortea con reemplazo, `permute` baraja el orden (misma equity final, distinto camino).
+    Cada posición conserva el día de la operación original para evaluar el límite diario. Los caminos
+    se procesan por bloques de ~`chunk_mb` y solo se guardan las métricas por camino.
+    """
+    if cfg is None:
+        cfg = get_cfg()
+    mc, rk = cfg.get("montecarlo", {}), cfg["risk"]
+    paths = paths or mc.get("paths", 10_000)
+    method = method or mc.get("method", "bootstrap")
+    seed = mc.get("seed", 42) if seed is None else seed
+    chunk_mb = chunk_mb or mc.get("chunk_mb", 256)
+    capital = rk["capital"]
+    r = np.asarray(r, dtype=np.float64)
+    n = len(r)
+    if n == 0:
+        return MonteCarloResult(np.zeros(paths), np.full(paths, capital), np.zeros(paths, dtype=bool),
+                                capital, mc.get("ruin_drawdown", 0.2))
+    days = np.asarray(days)
+    day_start = np.searchsorted(days, days, side="left")
+    # ~5 matrices de 8 bytes vivas por bloque (índices, retornos, equity, máximos, saldo al inicio del día)
+    rows = max(1, int(chunk_mb * 2**20 // (5 * 8 * n)))
+    rng = np.random.default_rng(seed)
+    dd, term, hit = np.empty(paths), np.empty(paths), np.empty(paths, dtype=bool)
+    with span("montecarlo", method=method) as sp:
+        for lo in range(0, paths, rows):
+            hi = min(paths, lo + rows)
+            dd[lo:hi], term[lo:hi], hit[lo:hi] = _chunk_stats(_paths(r, hi - lo, method, rng), day_start,
+                                                              capital, rk["daily_loss_limit"])
+        sp.set(rows=paths * n)
+    return MonteCarloResult(dd, term, hit, capital, mc.get("ruin_drawdown", 0.2))
+
+def run_montecarlo(trades: pd.DataFrame, cfg: dict | None = None, **kwargs) -> MonteCarloResult:
+    """`simulate_trades` sobre `BTResult.trades`."""
+    if cfg is None:
+        cfg = get_cfg()
+    r, days = trade_returns(trades, cfg["risk"]["capital"])
+    return simulate_trades(r, days, cfg, **kwargs)
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+    from mvpfx.backtest import ENGINES, run_backtest
+    p = argparse.ArgumentParser(description="Monte Carlo de operaciones: distribución de drawdown, equity final y límite diario")
+    p.add_argument("--paths", type=int, help="Caminos sintéticos (por defecto montecarlo.paths)")
+    p.add_argument("--method", choices=METHODS, help="bootstrap (con reemplazo) o permute (orden)")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--engine", choices=ENGINES, help="Motor de simulación (por defecto execution.engine)")
+    p.add_argument("--out", help="JSON de salida con el resumen")
+    args = p.parse_args()
+    cfg = get_cfg()
+    res = run_backtest(cfg=cfg, engine=args.engine, report_path=None)
+    t0 = time.perf_counter()
+    mc = run_montecarlo(res.trades, cfg, paths=args.paths, method=args.method, seed=args.seed)
+    summary = mc.summary()
+    print(json.dumps(summary, indent=2))
+    print(f"{summary['Paths']} caminos en {time.perf_counter() - t0:.2f} s")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
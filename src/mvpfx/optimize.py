@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import copy
+import itertools
+import yaml
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from mvpfx.config import get_cfg
+from mvpfx.data import load_data
+from mvpfx.indicators import ema, atr, rsi, bollinger, macd_from_ema, compute_all_indicators
+from mvpfx.strategy import generate_signals
+from mvpfx.backtest import backtest_signals
+from mvpfx.features import compute_features
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+def parse_values(spec: str) -> list:
+    """'3,5,8' -> [3,5,8]; '1.0:2.0:0.5' -> [1.0,1.5,2.0] (rango inclusivo)."""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        vals = np.arange(start, stop + step/2, step)
+        if all(float(x).is_integer() for x in (start, stop, step)):
+            return [int(v) for v in vals]
+        return [round(float(v), 10) for v in vals]
+    return [yaml.safe_load(v) for v in spec.split(",")]
+
+def parse_grid(specs: list[str]) -> dict[str, list]:
+    grid = {}
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        if not values:
+            raise ValueError(f"Parámetro inválido (usar seccion.clave=valores): {spec}")
+        grid[key.strip()] = parse_values(values)
+    return grid
+
+def set_param(cfg: dict, key: str, value) -> None:
+    node = cfg
+    *path, leaf = key.split(".")
+    for p in path:
+        node = node[p]
+    if leaf not in node:
+        raise KeyError(f"Parámetro desconocido en config: {key}")
+    node[leaf] = value
+
+def param_grid(grid: dict[str, list], cfg: dict | None = None) -> list[dict]:
+    if cfg is None:
+        cfg = get_cfg()
+    ind = cfg["indicators"]
+    keys = list(grid)
+    combos = [dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys))]
+    # Combinaciones sin sentido: EMA rápida >= lenta (la que no se barre toma el valor de cfg)
+    return [c for c in combos
+            if c.get("indicators.ema_fast", ind["ema_fast"]) < c.get("indicators.ema_slow", ind["ema_slow"])]
+
+def _values(grid: dict[str, list], cfg: dict, key: str) -> list:
+    section, name = key.split(".")
+    return list(grid.get(key, [cfg[section][name]]))
+
+def _num(x) -> str:
+    return f"{x:g}"
+
+def shared_columns(df: pd.DataFrame, cfg: dict, grid: dict[str, list]) -> dict[str, np.ndarray]:
+    """
+    OHLCV + todos los indicadores que necesita el barrido, sobre el histórico completo, como arrays float64.
+
+    Una columna por valor barrido: `ema_<span>`, `macd_<f>_<s>_<sig>` / `macd_signal_<f>_<s>_<sig>`,
+    `atr_<p>`, `rsi_<p>` y `bb_{mid,upper,lower}_<p>_<k>`; `reuse_columns` elige las de una combinación.
+    Se calculan con las mismas funciones que `compute_all_indicators`: los cruces usan
+    comparaciones estrictas y deben coincidir bit a bit con `run_backtest`.
+    """
+    c = df["close"]
+    cols = {k: df[k].to_numpy(dtype=np.float64) for k in OHLCV if k in df}
+    fast, slow = _values(grid, cfg, "indicators.ema_fast"), _values(grid, cfg, "indicators.ema_slow")
+    emas = {span: ema(c, span) for span in sorted(set(fast) | set(slow))}
+    for span, e in emas.items():
+        cols[f"ema_{span}"] = e.to_numpy()
+    for f, sl, sig in itertools.product(fast, slow, _values(grid, cfg, "indicators.macd_signal")):
+        if f < sl:
+            m, ms, _ = macd_from_ema(emas[f], emas[sl], sig)
+            cols[f"macd_{f}_{sl}_{sig}"], cols[f"macd_signal_{f}_{sl}_{sig}"] = m.to_numpy(), ms.to_numpy()
+    for p in _values(grid, cfg, "indicators.atr_period"):
+        cols[f"atr_{p}"] = atr(df["high"], df["low"], c, p).to_numpy()
+    for p in _values(grid, cfg, "indicators.rsi_period"):
+        cols[f"rsi_{p}"] = rsi(c, p).to_numpy()
+    for p, k in itertools.product(_values(grid, cfg, "indicators.bb_period"), _values(grid, cfg, "indicators.bb_k")):
+        bbm, bbu, bbl = bollinger(c, p, k)
+        tag = f"{p}_{_num(k)}"
+        cols[f"bb_mid_{tag}"], cols[f"bb_upper_{tag}"], cols[f"bb_lower_{tag}"] = bbm.to_numpy(), bbu.to_numpy(), bbl.to_numpy()
+    return cols
+
+def reuse_columns(df: pd.DataFrame, cfg: dict) -> dict[str, pd.Series]:
+    """Columnas de `shared_columns` que corresponden a los parámetros de `cfg`, con los nombres de `compute_all_indicators`."""
+    ind = cfg["indicators"]
+    f, sl, sig = ind["ema_fast"], ind["ema_slow"], ind["macd_signal"]
+    bb = f"{ind['bb_period']}_{_num(ind['bb_k'])}"
+    names = {"ema_fast": f"ema_{f}", "ema_slow": f"ema_{sl}",
+             "macd": f"macd_{f}_{sl}_{sig}", "macd_signal": f"macd_signal_{f}_{sl}_{sig}",
+             "atr": f"atr_{ind['atr_period']}", "rsi": f"rsi_{ind['rsi_period']}",
+             "bb_mid": f"bb_mid_{bb}", "bb_upper": f"bb_upper_{bb}", "bb_lower": f"bb_lower_{bb}"}
+    return {k: df[col] for k, col in names.items() if col in df}
+
+class SharedFrame:
+    """Bloque de memoria compartida con columnas float64 + índice temporal en int64 (ns)."""
+
+    def __init__(self, index: pd.DatetimeIndex, cols: dict[str, np.ndarray]):
+        self.names = list(cols)
+        self.n = len(index)
+        k = len(self.names) + 1
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, k * self.n * 8))
+        buf = np.ndarray((k, self.n), dtype=np.float64, buffer=self.shm.buf)
+        buf[0].view(np.int64)[:] = index.as_unit("ns").asi8
+        for i, name in enumerate(self.names, start=1):
+            buf[i] = cols[name]
+        self.spec = (self.shm.name, self.names, self.n)
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    @staticmethod
+    def attach(spec) -> tuple[shared_memory.SharedMemory, pd.DataFrame]:
+        name, names, n = spec
+        shm = shared_memory.SharedMemory(name=name)
+        buf = np.ndarray((len(names) + 1, n), dtype=np.float64, buffer=shm.buf)
+        index = pd.DatetimeIndex(buf[0].view(np.int64).copy(), tz="UTC")
+        df = pd.DataFrame({k: buf[i] for i, k in enumerate(names, start=1)}, index=index, copy=False)
+        return shm, df
+
+# Estado por worker (se inicializa una vez por proceso)
+_W: dict = {}
+
+def _init_worker(spec, cfg: dict) -> None:
+    shm, df = SharedFrame.attach(spec)
+    _W.update(shm=shm, df=df, cfg=cfg)
+
+def evaluate(df: pd.DataFrame, cfg: dict, params: dict) -> dict:
+    """
+    Métricas de una combinación sobre `df` (OHLCV + columnas de `shared_columns`).
+
+    Con `features.compact` las señales van a un `FeatureFrame` (como `prepare_backtest_frame`).
+    """
+    cfg = copy.deepcopy(cfg)
+    for k, v in params.items():
+        set_param(cfg, k, v)
+    base, reuse = df[[k for k in OHLCV if k in df]], reuse_columns(df, cfg)
+    if cfg.get("features", {}).get("compact", False):
+        sigs = compute_features(base, cfg, reuse=reuse).window(cfg["warmup_bars"])
+    else:
+        sigs = generate_signals(compute_all_indicators(base, cfg, reuse), cfg).iloc[cfg["warmup_bars"]:]
+    res = backtest_signals(sigs, cfg)
+    exits = int((res.trades["type"] == "exit").sum()) if len(res.trades) else 0
+    last_eq = float(res.equity_curve.iloc[-1]) if len(res.equity_curve) else cfg["risk"]["capital"]
+    return {**params, **res.metrics, "Trades": exits, "FinalEquity": last_eq}
+
+def _evaluate_task(params: dict) -> dict:
+    return evaluate(_W["df"], _W["cfg"], params)
+
+def run_sweep(grid: dict[str, list], df: pd.DataFrame | None = None, cfg: dict | None = None,
+              workers: int | None = None, sort_by: str = "Sharpe") -> pd.DataFrame:
+    if cfg is None:
+        cfg = get_cfg()
+    if df is None:
+        df = load_data(cfg)
+    combos = param_grid(grid, cfg)
+    if not combos:
+        return pd.DataFrame()
+    shared = SharedFrame(df.index, shared_columns(df, cfg, grid))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.spec, cfg)) as pool:
+            rows = list(pool.map(_evaluate_task, combos, chunksize=max(1, len(combos) // (4 * (workers or os.cpu_count() or 1)))))
+    finally:
+        shared.close()
+    table = pd.DataFrame(rows).sort_values(sort_by, ascending=False, kind="stable").reset_index(drop=True)
+    table.index.name = "rank"
+    return table
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Barrido de parámetros (grid search) en paralelo")
+    p.add_argument("--param", action="append", required=True,
+                   help="seccion.clave=valores, p.ej. indicators.ema_fast=3,5,8 o risk.atr_sl_mult=1.0:2.0:0.5")
+    p.add_argument("--workers", type=int, help="Procesos (por defecto: núcleos disponibles)")
+    p.add_argument("--sort", default="Sharpe", help="Métrica de ranking")
+    p.add_argument("--out", default="optimize_results.csv", help="CSV de salida con la tabla ordenada")
+    p.add_argument("--top", type=int, default=10, help="Filas a mostrar")
+    args = p.parse_args()
+    table = run_sweep(parse_grid(args.param), workers=args.workers, sort_by=args.sort)
+    print(table.head(args.top).to_string())
+    table.to_csv(args.out)
+    print(f"Guardado en {args.out} ({len(table)} combinaciones)")
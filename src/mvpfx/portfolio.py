@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import copy
+import json
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from mvpfx.config import get_cfg
+from mvpfx.data import load_data
+from mvpfx.backtest import prepare_backtest_frame, compute_metrics, intrabar_exit, SAME_BAR_POLICIES
+from mvpfx.risk import position_size, DailyRiskLedger
+from mvpfx.features import FeatureFrame
+
+@dataclass
+class PortfolioResult:
+    equity_curve: pd.Series
+    trades: pd.DataFrame
+    metrics: dict
+    per_symbol: dict = field(default_factory=dict)
+
+def _merge(base: dict, over: dict) -> dict:
+    for k, v in over.items():
+        if isinstance(v, dict) and isinstance(base.get(k), dict):
+            _merge(base[k], v)
+        else:
+            base[k] = v
+    return base
+
+def symbol_cfg(cfg: dict, symbol: str, i: int = 0) -> dict:
+    """Config de un símbolo: `symbol` cambiado + `portfolio.overrides[symbol]` (spreads, csv_path...)."""
+    c = copy.deepcopy(cfg)
+    c["symbol"] = symbol
+    if c["data"]["source"] == "simulated":
+        # Series distintas por símbolo en modo simulado
+        c["data"]["seed"] = c["data"]["seed"] + i
+    return _merge(c, copy.deepcopy(cfg.get("portfolio", {}).get("overrides", {}).get(symbol, {})))
+
+def _prepare(args) -> pd.DataFrame | FeatureFrame:
+    df, cfg = args
+    if df is None:
+        df = load_data(cfg)
+    return prepare_backtest_frame(df, cfg)
+
+def prepare_frames(symbols: list[str], cfg: dict, frames: dict[str, pd.DataFrame] | None = None,
+                   workers: int | None = None) -> dict[str, pd.DataFrame | FeatureFrame]:
+    """Carga + indicadores + señales por símbolo; en paralelo (un proceso por símbolo) salvo `workers=1`."""
+    frames = frames or {}
+    tasks = [(frames.get(s), symbol_cfg(cfg, s, i)) for i, s in enumerate(symbols)]
+    if workers == 1 or len(tasks) == 1:
+        out = [_prepare(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1)) as pool:
+            out = list(pool.map(_prepare, tasks))
+    return dict(zip(symbols, out))
+
+def align(frames: dict[str, pd.DataFrame | FeatureFrame], column: str, fill=np.nan) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    """Matriz (n_barras_unión, n_símbolos) de `column` sobre la unión de timestamps (DataFrame o `FeatureFrame`)."""
+    index = frames[next(iter(frames))].index
+    for df in list(frames.values())[1:]:
+        index = index.union(df.index)
+    col = lambda df: pd.Series(np.asarray(df[column], dtype=np.float64), index=df.index)
+    mat = np.column_stack([col(df).reindex(index).to_numpy() for df in frames.values()])
+    if not np.isnan(fill):
+        mat[np.isnan(mat)] = fill
+    return index, mat
+
+def simulate_portfolio(frames: dict[str, pd.DataFrame], cfg: dict, sym_cfgs: dict[str, dict] | None = None,
+                       engine: str | None = None) -> tuple[pd.Series, pd.DataFrame, np.ndarray]:
+    """
+    Simulación conjunta sobre la línea temporal común.
+
+    Misma mecánica por símbolo que el motor de `execution.engine` (una posición por símbolo:
+    SL/TP de la barra en curso en `vectorized`/`legacy`, fijados en la entrada y tocados por
+    high/low en `intrabar`), pero el tamaño se calcula contra la equity realizada de la
+    cartera y el límite diario (`DailyRiskLedger`) es global y se reinicia cada día UTC.
+    En cada timestamp se procesan primero todas las salidas y después las entradas.
+    """
+    symbols = list(frames)
+    sym_cfgs = sym_cfgs or {s: cfg for s in symbols}
+    engine = engine or cfg["execution"].get("engine", "intrabar")
+    if engine == "intrabar":
+        return _simulate_portfolio_intrabar(frames, cfg, sym_cfgs)
+    if engine not in ("vectorized", "legacy"):
+        raise ValueError(f"engine desconocido: {engine}")
+    index, close = align(frames, "close")
+    _, sl = align(frames, "sl")
+    _, tp = align(frames, "tp")
+    _, atr = align(frames, "atr")
+    _, signal = align(frames, "signal", fill=0.0)
+    signal = signal.astype(np.int64)
+    spread = np.array([sym_cfgs[s]["execution"]["simulate_spread"]/2 + sym_cfgs[s]["execution"]["simulate_slippage"]
+                       for s in symbols])
+    ask, bid = close + spread, close - spread
+    n, k = close.shape
+
+    capital = cfg["risk"]["capital"]
+    equity = capital
+    pnl_mat = np.zeros((n, k), dtype=np.float64)
+    position = np.zeros(k, dtype=np.int64)
+    units = np.zeros(k, dtype=np.int64)
+    entry = np.full(k, np.nan)
+    records = []
+    ledger = DailyRiskLedger(capital, cfg)
+    events = np.flatnonzero(((signal != 0) | ~np.isnan(sl) | ~np.isnan(tp)).any(axis=1))
+
+    for i in events:
+        ts = index[i]
+        for j in np.flatnonzero(position):
+            exit_price = None
+            if position[j] == 1 and (bid[i, j] <= sl[i, j] or bid[i, j] >= tp[i, j]):
+                exit_price = bid[i, j]; pnl = (exit_price - entry[j]) * units[j]
+            elif position[j] == -1 and (ask[i, j] >= sl[i, j] or ask[i, j] <= tp[i, j]):
+                exit_price = ask[i, j]; pnl = (entry[j] - exit_price) * units[j]
+            if exit_price is not None:
+                equity += pnl; pnl_mat[i, j] = pnl
+                records.append({"time":ts,"symbol":symbols[j],"type":"exit","price":float(exit_price),"pnl":float(pnl)})
+                ledger.record(ts, pnl)
+                position[j], units[j] = 0, 0
+        for j in np.flatnonzero((position == 0) & (signal[i] != 0)):
+            if ledger.limit_hit(ts):
+                break
+            side = signal[i, j]
+            price = ask[i, j] if side == 1 else bid[i, j]
+            units[j] = position_size(equity, price, atr[i, j], sym_cfgs[symbols[j]])
+            entry[j], position[j] = price, side
+            records.append({"time":ts,"symbol":symbols[j],"type":"entry_long" if side == 1 else "entry_short",
+                            "price":float(price),"units":int(units[j])})
+
+    eq = pd.Series(capital + np.cumsum(pnl_mat.sum(axis=1)), index=index)
+    return eq, pd.DataFrame(records), pnl_mat
+
+def _simulate_portfolio_intrabar(frames: dict[str, pd.DataFrame], cfg: dict,
+                                 sym_cfgs: dict[str, dict]) -> tuple[pd.Series, pd.DataFrame, np.ndarray]:
+    # Como `simulate_intrabar` por símbolo: entrada al cierre, salida en la primera barra posterior que toque SL/TP
+    policy = cfg["execution"].get("same_bar_policy", "sl_first")
+    if policy not in SAME_BAR_POLICIES:
+        raise ValueError(f"same_bar_policy desconocida: {policy}")
+    symbols = list(frames)
+    index, close = align(frames, "close")
+    mats = {c: align(frames, c)[1] for c in ("open", "high", "low", "sl", "tp", "atr")}
+    _, signal = align(frames, "signal", fill=0.0)
+    signal = signal.astype(np.int64)
+    half = np.array([sym_cfgs[s]["execution"]["simulate_spread"]/2 + sym_cfgs[s]["execution"]["simulate_slippage"]
+                     for s in symbols])
+    n, k = close.shape
+
+    capital = cfg["risk"]["capital"]
+    equity = capital
+    pnl_mat = np.zeros((n, k), dtype=np.float64)
+    position = np.zeros(k, dtype=np.int64)
+    units = np.zeros(k, dtype=np.int64)
+    entry, stop, target = np.full(k, np.nan), np.full(k, np.nan), np.full(k, np.nan)
+    records = []
+    ledger = DailyRiskLedger(capital, cfg)
+    can_enter = (signal != 0) & ~np.isnan(mats["sl"]) & ~np.isnan(mats["tp"])
+    entry_rows = np.flatnonzero(can_enter.any(axis=1))
+
+    i = entry_rows[0] if len(entry_rows) else n
+    while i < n:
+        ts = index[i]
+        for j in np.flatnonzero(position):
+            # Lado bid para cerrar largos, ask para cortos (barras ausentes del símbolo: NaN, no tocan)
+            adj = -half[j] if position[j] == 1 else half[j]
+            out = intrabar_exit(position[j], mats["open"][i, j] + adj, mats["high"][i, j] + adj,
+                                mats["low"][i, j] + adj, stop[j], target[j], policy)
+            if out is None:
+                continue
+            exit_price, reason = out
+            pnl = (exit_price - entry[j]) * units[j] if position[j] == 1 else (entry[j] - exit_price) * units[j]
+            equity += pnl; pnl_mat[i, j] = pnl
+            records.append({"time":ts,"symbol":symbols[j],"type":"exit","price":float(exit_price),"pnl":float(pnl),
+                            "reason":reason})
+            ledger.record(ts, pnl)
+            position[j], units[j] = 0, 0
+        for j in np.flatnonzero((position == 0) & can_enter[i]):
+            if ledger.limit_hit(ts):
+                break
+            side = signal[i, j]
+            price = close[i, j] + half[j] if side == 1 else close[i, j] - half[j]
+            units[j] = position_size(equity, price, mats["atr"][i, j], sym_cfgs[symbols[j]])
+            entry[j], stop[j], target[j], position[j] = price, mats["sl"][i, j], mats["tp"][i, j], side
+            records.append({"time":ts,"symbol":symbols[j],"type":"entry_long" if side == 1 else "entry_short",
+                            "price":float(price),"units":int(units[j]),"sl":float(stop[j]),"tp":float(target[j])})
+        if position.any():
+            i += 1
+        else:
+            # Sin posiciones abiertas se salta a la siguiente barra con entrada posible
+            nxt = int(np.searchsorted(entry_rows, i, side="right"))
+            i = entry_rows[nxt] if nxt < len(entry_rows) else n
+
+    eq = pd.Series(capital + np.cumsum(pnl_mat.sum(axis=1)), index=index)
+    return eq, pd.DataFrame(records), pnl_mat
+
+def run_portfolio(symbols: list[str] | None = None, cfg: dict | None = None,
+                  frames: dict[str, pd.DataFrame] | None = None, workers: int | None = None,
+                  report_path: str | None = "portfolio_report.json") -> PortfolioResult:
+    """
+    Backtest de cartera: `symbols` (por defecto `portfolio.symbols`) cargados con `load_data`
+    o tomados de `frames` (OHLCV crudo por símbolo).
+    """
+    if cfg is None:
+        cfg = get_cfg()
+    if symbols is None:
+        symbols = cfg.get("portfolio", {}).get("symbols") or [cfg["symbol"]]
+    prepared = prepare_frames(symbols, cfg, frames, workers)
+    sym_cfgs = {s: symbol_cfg(cfg, s, i) for i, s in enumerate(symbols)}
+    eq, trades, pnl_mat = simulate_portfolio(prepared, cfg, sym_cfgs)
+    capital = cfg["risk"]["capital"]
+    per_symbol = {}
+    for j, s in enumerate(symbols):
+        # Contribución del símbolo: capital + su PnL acumulado
+        contrib = pd.Series(capital + np.cumsum(pnl_mat[:, j]), index=eq.index)
+        exits = trades[(trades["symbol"] == s) & (trades["type"] == "exit")] if len(trades) else trades
+        per_symbol[s] = {**compute_metrics(contrib), "Trades": int(len(exits)),
+                         "PnL": float(pnl_mat[:, j].sum())}
+    res = PortfolioResult(equity_curve=eq, trades=trades, metrics=compute_metrics(eq), per_symbol=per_symbol)
+    if report_path:
+        last_eq = float(eq.iloc[-1]) if len(eq) > 0 else capital
+        with open(report_path,"w",encoding="utf-8") as f:
+            json.dump({"metrics":res.metrics,"last_equity":last_eq,"per_symbol":per_symbol}, f, indent=2)
+    return res
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Backtest de cartera multi-símbolo")
+    p.add_argument("--symbols", help="Lista separada por comas (por defecto portfolio.symbols)")
+    p.add_argument("--workers", type=int, help="Procesos para indicadores/señales por símbolo")
+    p.add_argument("--print", action="store_true", help="Imprime métricas")
+    args = p.parse_args()
+    res = run_portfolio(args.symbols.split(",") if args.symbols else None, workers=args.workers)
+    if args.print:
+        print(res.metrics)
+        print(pd.DataFrame(res.per_symbol).T.to_string())
+    print("OK: portfolio_report.json generado.")
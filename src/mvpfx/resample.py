@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import numpy as np
+import pandas as pd
+from mvpfx.config import get_cfg
+from mvpfx.data import timeframe_to_minutes, dedupe_bars
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.instrument import span
+
+NS_PER_MIN = 60 * 10**9
+
+def _step_ns(timeframe: str) -> int:
+    return timeframe_to_minutes(timeframe) * NS_PER_MIN
+
+def _step(timeframe: str, unit: str) -> int:
+    return int(np.timedelta64(timeframe_to_minutes(timeframe), "m") / np.timedelta64(1, unit))
+
+def _to_index(ticks: np.ndarray, like: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(ticks.astype(f"datetime64[{like.unit}]"), name=like.name)
+    return idx.tz_localize("UTC").tz_convert(like.tz) if like.tz is not None else idx
+
+def bucket_starts(index: pd.DatetimeIndex, timeframe: str) -> np.ndarray:
+    """Apertura de la barra de `timeframe` a la que pertenece cada timestamp (enteros en la unidad del índice)."""
+    # En la unidad nativa del índice: convertir a ns costaría una copia y más que la propia agregación
+    step = _step(timeframe, index.unit)
+    return index.asi8 // step * step
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str, now: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Agrega barras (p.ej. M1) a `timeframe` en una sola pasada vectorizada.
+
+    open = primera, high = máximo, low = mínimo, close = última, volume = suma. El índice es
+    la apertura de cada barra (mismo convenio que el resto de timeframes) y los huecos no
+    generan barras vacías. Con `now` solo se devuelven barras cerradas (apertura + timeframe <= now).
+    """
+    if not df.index.is_monotonic_increasing or df.index.has_duplicates:
+        df = dedupe_bars(df)
+    cols = [c for c in ("open", "high", "low", "close", "volume") if c in df]
+    if len(df) == 0:
+        return df[cols]
+    with span("resample", timeframe=timeframe) as sp:
+        keys = bucket_starts(df.index, timeframe)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(df)] - 1
+        out = {"open": df["open"].to_numpy()[starts],
+               "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+               "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+               "close": df["close"].to_numpy()[ends]}
+        if "volume" in df:
+            out["volume"] = np.add.reduceat(df["volume"].to_numpy(), starts)
+        res = pd.DataFrame(out, index=_to_index(keys[starts], df.index))
+        if now is not None:
+            res = res[res.index + pd.Timedelta(_step_ns(timeframe), unit="ns") <= now]
+        sp.set(rows=len(res))
+    return res
+
+class Resampler:
+    """
+    Agregación incremental: `update(ts, bar)` recibe cada barra base (M1) en orden y devuelve
+    las barras de `timeframe` que quedan cerradas, como lista de (apertura, barra).
+
+    Una barra se cierra en cuanto llega su última barra base (apertura + base >= fin del
+    periodo) o, si esa falta, cuando llega una del periodo siguiente o `close_due(now)`.
+    El resultado coincide con `resample_ohlcv` sobre la misma serie.
+    """
+
+    def __init__(self, timeframe: str, base: str = "M1"):
+        self.timeframe = timeframe
+        self.step = _step_ns(timeframe)
+        self.base = _step_ns(base)
+        self.start: int | None = None
+        self.bar: dict | None = None
+
+    @property
+    def partial(self) -> tuple[pd.Timestamp, dict] | None:
+        """Barra en curso (aún sin cerrar), o None."""
+        return (pd.Timestamp(self.start, unit="ns", tz="UTC"), dict(self.bar)) if self.bar is not None else None
+
+    def _emit(self) -> tuple[pd.Timestamp, dict]:
+        done = (pd.Timestamp(self.start, unit="ns", tz="UTC"), self.bar)
+        self.start = self.bar = None
+        return done
+
+    def update(self, ts: pd.Timestamp, bar) -> list[tuple[pd.Timestamp, dict]]:
+        t = pd.Timestamp(ts).as_unit("ns").value
+        key = t // self.step * self.step
+        closed = []
+        if self.start is not None and key != self.start:
+            closed.append(self._emit())
+        if self.bar is None:
+            self.start = key
+            self.bar = {"open": float(bar["open"]), "high": float(bar["high"]),
+                        "low": float(bar["low"]), "close": float(bar["close"])}
+            if "volume" in bar:
+                self.bar["volume"] = bar["volume"]
+        else:
+            b = self.bar
+            b["high"] = max(b["high"], float(bar["high"]))
+            b["low"] = min(b["low"], float(bar["low"]))
+            b["close"] = float(bar["close"])
+            if "volume" in b:
+                b["volume"] += bar["volume"]
+        if t + self.base >= key + self.step:
+            closed.append(self._emit())
+        return closed
+
+    def close_due(self, now: pd.Timestamp) -> list[tuple[pd.Timestamp, dict]]:
+        """Cierra la barra en curso si su periodo ya terminó (p.ej. falta la última barra base)."""
+        if self.start is not None and self.start + self.step <= pd.Timestamp(now).as_unit("ns").value:
+            return [self._emit()]
+        return []
+
+def align_to(index: pd.DatetimeIndex, timeframe: str, htf: pd.DataFrame, htf_timeframe: str,
+             columns: list[str] | None = None, prefix: str = "htf_") -> pd.DataFrame:
+    """
+    Lleva columnas de un timeframe superior al índice `index` (aperturas en `timeframe`) sin lookahead.
+
+    Cada barra inferior recibe los valores de la última barra superior que ya había cerrado
+    al cierre de la barra inferior (cierre superior <= cierre inferior); antes de la primera, NaN.
+    """
+    columns = list(columns or htf.columns)
+    close_lo = index + pd.Timedelta(_step_ns(timeframe), unit="ns")
+    close_hi = htf.index + pd.Timedelta(_step_ns(htf_timeframe), unit="ns")
+    pos = close_hi.searchsorted(close_lo, side="right") - 1
+    vals = htf[columns].to_numpy(dtype=np.float64)
+    out = np.full((len(index), len(columns)), np.nan)
+    ok = pos >= 0
+    out[ok] = vals[pos[ok]]
+    return pd.DataFrame(out, index=index, columns=[prefix + c for c in columns])
+
+def mtf_frame(base: pd.DataFrame, cfg: dict | None = None, timeframe: str | None = None,
+              htf_timeframe: str = "H1", now: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Indicadores en `timeframe` + filtro de tendencia de `htf_timeframe`, ambos derivados del mismo feed base.
+
+    Añade `htf_ema_fast`, `htf_ema_slow` y `htf_trend` (+1/-1/0, signo de la EMA rápida menos
+    la lenta en el timeframe superior); `generate_signals` usa `htf_trend` si está presente.
+    """
+    if cfg is None:
+        cfg = get_cfg()
+    timeframe = timeframe or cfg["timeframe"]
+    feats = compute_all_indicators(resample_ohlcv(base, timeframe, now), cfg)
+    hi = compute_all_indicators(resample_ohlcv(base, htf_timeframe, now), cfg)
+    hi["trend"] = np.sign(hi["ema_fast"] - hi["ema_slow"])
+    return feats.join(align_to(feats.index, timeframe, hi, htf_timeframe, ["ema_fast", "ema_slow", "trend"]))
+
+if __name__ == "__main__":
+    import argparse
+    from mvpfx.data import simulate_ohlcv
+    p = argparse.ArgumentParser(description="Derivar timeframes superiores desde barras M1")
+    p.add_argument("--csv", help="CSV de barras M1 (timestamp, open, high, low, close, volume); por defecto simuladas")
+    p.add_argument("--bars", type=int, default=10_000, help="Barras M1 simuladas si no hay --csv")
+    p.add_argument("--to", default="M5,M15,H1", help="Timeframes destino, separados por comas")
+    args = p.parse_args()
+    if args.csv:
+        m1 = pd.read_csv(args.csv, parse_dates=["timestamp"]).set_index("timestamp")
+        m1 = m1.tz_localize("UTC") if m1.index.tz is None else m1.tz_convert("UTC")
+    else:
+        m1 = simulate_ohlcv(args.bars, "M1")
+    for tf in args.to.split(","):
+        out = resample_ohlcv(m1, tf)
+        print(f"{tf}: {len(out)} barras")
+        print(out.tail(3))
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import json
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable
+from mvpfx.data import timeframe_to_minutes
+
+def config_hash(cfg: dict) -> str:
+    return hashlib.sha1(json.dumps(cfg, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+def next_bar_boundary(now: float, timeframe: str) -> float:
+    """Epoch (s) del cierre de la barra en curso."""
+    step = timeframe_to_minutes(timeframe) * 60
+    return (now // step + 1) * step
+
+class BarAlignedCache:
+    """
+    Caché de respuestas (bytes) válida hasta el siguiente cierre de barra o `ttl`, lo que llegue antes.
+
+    Las peticiones concurrentes para la misma clave esperan al primer cálculo en curso
+    (single-flight) en lugar de recalcular.
+    """
+
+    def __init__(self, ttl: float | None = None, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, tuple[float, bytes]] = {}
+        self._inflight: dict[Hashable, Future] = {}
+        self.hits = self.misses = self.coalesced = 0
+
+    def _claim(self, key: Hashable) -> tuple[bytes | None, Future | None, bool, float]:
+        # (valor en caché | None, future en curso, ¿somos el líder?, ahora)
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(key)
+            if entry is not None and now < entry[0]:
+                self.hits += 1
+                return entry[1], None, False, now
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+            return None, fut, leader, now
+
+    def _store(self, key: Hashable, timeframe: str, now: float, value: bytes) -> None:
+        expires = next_bar_boundary(now, timeframe)
+        if self.ttl is not None:
+            expires = min(expires, now + self.ttl)
+        with self._lock:
+            # Purga de entradas caducadas (claves de cfg/símbolo que ya no se piden)
+            for k in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                del self._entries[k]
+            self._entries[key] = (expires, value)
+
+    async def aget_or_compute(self, key: Hashable, timeframe: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Variante asíncrona de `get_or_compute` (mismo single-flight, compartido con la síncrona)."""
+        value, fut, leader, now = self._claim(key)
+        if value is not None:
+            return value
+        if not leader:
+            return await asyncio.wrap_future(fut)
+        try:
+            value = await compute()
+            self._store(key, timeframe, now, value)
+            fut.set_result(value)
+            return value
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_or_compute(self, key: Hashable, timeframe: str, compute: Callable[[], bytes]) -> bytes:
+        value, fut, leader, now = self._claim(key)
+        if value is not None:
+            return value
+        if not leader:
+            return fut.result()
+        try:
+            value = compute()
+            self._store(key, timeframe, now, value)
+            fut.set_result(value)
+            return value
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                    "entries": len(self._entries),
+                    "hit_rate": (self.hits + self.coalesced) / total if total else 0.0}
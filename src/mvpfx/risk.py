@@ -22,18 +22,56 @@ def position_size(equity: float, price: float, atr: float, cfg: dict | None = No
     units = max(rk["min_position_units"], min(units, rk["max_position_units"]))
     return int(units)
 
+class DailyRiskLedger:
+    """
+    Contador incremental de operaciones y PnL del día UTC en curso.
+
+    `record` se llama en cada salida y `limit_hit` responde en O(1). Sin `ts`,
+    el día de referencia es el de la última salida registrada (semántica de
+    `enforce_daily_limits`); con `ts`, un cambio de día reinicia los contadores.
+    """
+
+    def __init__(self, equity0: float, cfg: dict | None = None):
+        if cfg is None:
+            cfg = get_cfg()
+        rk = cfg["risk"]
+        self.equity0 = equity0
+        self.max_trades = rk["max_trades_per_day"]
+        self.loss_limit = rk["daily_loss_limit"]
+        self.day = None
+        self.trades = 0
+        self.pnl = 0.0
+
+    def _roll(self, day) -> None:
+        if day != self.day:
+            self.day, self.trades, self.pnl = day, 0, 0.0
+
+    def record(self, ts, pnl: float) -> None:
+        self._roll(ts.date())
+        self.trades += 1
+        self.pnl += pnl
+
+    def limit_hit(self, ts=None) -> bool:
+        if ts is not None:
+            self._roll(ts.date())
+        if self.trades == 0:
+            return False
+        if self.trades >= self.max_trades:
+            return True
+        return self.pnl / self.equity0 <= -self.loss_limit
+
+    @classmethod
+    def from_trade_log(cls, trade_log_df, equity0: float, cfg: dict | None = None) -> "DailyRiskLedger":
+        ledger = cls(equity0, cfg)
+        if trade_log_df is not None and len(trade_log_df) > 0:
+            today = trade_log_df.index[-1].date()
+            day = trade_log_df[trade_log_df.index.date == today]
+            ledger.day, ledger.trades, ledger.pnl = today, len(day), day["pnl"].sum()
+        return ledger
+
 def enforce_daily_limits(trade_log_df, equity0: float, cfg: dict | None = None) -> bool:
-    if cfg is None:
-        cfg = get_cfg()
-    rk = cfg["risk"]
-    if trade_log_df is None or len(trade_log_df) == 0:
-        return False
-    today = trade_log_df.index[-1].date()
-    day = trade_log_df[trade_log_df.index.date == today]
-    if len(day) >= rk["max_trades_per_day"]:
-        return True
-    pnl_day = (day["pnl"].sum()) / equity0
-    return pnl_day <= -rk["daily_loss_limit"]
+    """Compatibilidad: evalúa el límite diario reconstruyendo un `DailyRiskLedger` desde el log."""
+    return DailyRiskLedger.from_trade_log(trade_log_df, equity0, cfg).limit_hit()
 
 if __name__ == "__main__":
     import argparse
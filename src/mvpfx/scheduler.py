@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import asyncio
+import time
+import pandas as pd
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+from mvpfx.config import get_cfg
+from mvpfx.data import SimulatedFeed, load_data, timeframe_to_minutes, dedupe_bars
+from mvpfx.indicators import compute_all_indicators, IndicatorState
+from mvpfx.strategy import generate_signals, SignalEngine
+from mvpfx.response_cache import next_bar_boundary
+from mvpfx.logging_utils import get_logger
+from mvpfx.instrument import span
+
+@dataclass
+class SignalSnapshot:
+    """Último estado publicado: frame de señales y cuerpos ya serializados por formato."""
+    frame: pd.DataFrame
+    bar: pd.Timestamp
+    updated: float
+    bodies: dict[str, bytes] = field(default_factory=dict)
+
+def default_fetch(cfg: dict, clock: Callable[[], float] = time.time) -> Callable[[pd.Timestamp | None], pd.DataFrame]:
+    """`fetch(since)` según `data.source`: feed simulado en vivo o `load_data` (incremental con data.cache)."""
+    if cfg["data"]["source"] == "simulated":
+        return SimulatedFeed(cfg["timeframe"], cfg["data"]["bars"], cfg["data"]["seed"], clock)
+    return lambda since: load_data(cfg)
+
+class BarScheduler:
+    """
+    Ingesta en segundo plano: en cada cierre de barra pide las barras nuevas, actualiza
+    indicadores y señales de forma incremental (`IndicatorState`/`SignalEngine`) y publica
+    un `SignalSnapshot` que `/signals` sirve sin recalcular. `on_publish(snapshot, nuevas)`
+    recibe además solo las filas añadidas en cada refresco.
+
+    Solo se procesan barras cerradas (apertura + timeframe <= ahora). `clock` y `sleep`
+    se pueden sustituir por un reloj simulado en tests.
+    """
+
+    def __init__(self, cfg: dict | None = None, fetch: Callable[[pd.Timestamp | None], pd.DataFrame] | None = None,
+                 encode: Callable[[pd.DataFrame, str], bytes] | None = None, formats: tuple[str, ...] = ("rows", "columnar"),
+                 window: int = 250, delay: float = 1.0, clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep,
+                 on_publish: Callable[[SignalSnapshot, pd.DataFrame], None] | None = None):
+        self.cfg = cfg if cfg is not None else get_cfg()
+        self.clock, self.sleep = clock, sleep
+        self.fetch = fetch or default_fetch(self.cfg, clock)
+        self.encode, self.formats = encode, formats
+        self.keep = max(1, window - self.cfg["warmup_bars"])
+        self.delay = delay
+        self.on_publish = on_publish
+        self.step = pd.Timedelta(minutes=timeframe_to_minutes(self.cfg["timeframe"]))
+        self.snapshot: SignalSnapshot | None = None
+        self.checked: float | None = None  # último fetch correcto (aunque no trajera barras nuevas)
+        self.frame: pd.DataFrame | None = None
+        self.ticks = 0
+        self._ind: IndicatorState | None = None
+        self._sig: SignalEngine | None = None
+        self._task: asyncio.Task | None = None
+        self.log = get_logger("mvpfx.scheduler")
+
+    def _closed(self, df: pd.DataFrame) -> pd.DataFrame:
+        now = pd.Timestamp(self.clock(), unit="s", tz="UTC")
+        return df[df.index + self.step <= now]
+
+    def refresh(self) -> int:
+        """Incorpora las barras cerradas nuevas y publica; devuelve cuántas se han procesado."""
+        last = self.frame.index[-1] if self.frame is not None else None
+        with span("scheduler.refresh") as sp:
+            bars = self._closed(dedupe_bars(self.fetch(last)))
+            self.checked = self.clock()
+            if self.frame is None:
+                if len(bars) == 0:
+                    return 0
+                feats = compute_all_indicators(bars, self.cfg)
+                frame = generate_signals(feats.iloc[self.cfg["warmup_bars"]:].copy(), self.cfg)
+                self._ind = IndicatorState.from_history(bars, self.cfg)
+                self._sig = SignalEngine.from_history(feats, self.cfg)
+                new = len(bars)
+            else:
+                bars = bars[bars.index > last]
+                new = len(bars)
+                if new == 0:
+                    return 0
+                rows = []
+                for ts, bar in zip(bars.index, bars.to_dict("records")):
+                    row = {**bar, **self._ind.update(bar)}
+                    rows.append({**row, **self._sig.update(row)})
+                frame = pd.concat([self.frame, pd.DataFrame(rows, index=bars.index)[self.frame.columns]])
+            self.frame = frame.iloc[-self.keep:]
+            self._publish(new)
+            sp.set(rows=new)
+        return new
+
+    def age(self) -> float | None:
+        """Segundos desde el último fetch correcto (None si aún no hay snapshot)."""
+        if self.snapshot is None or self.checked is None:
+            return None
+        return self.clock() - self.checked
+
+    def _publish(self, new: int) -> None:
+        bodies = {fmt: self.encode(self.frame, fmt) for fmt in self.formats} if self.encode else {}
+        # Sustitución atómica de la referencia: los lectores ven el snapshot anterior o el nuevo
+        self.snapshot = SignalSnapshot(self.frame, self.frame.index[-1], self.clock(), bodies)
+        if self.on_publish is not None:
+            # Solo las filas nuevas (p.ej. para difundirlas por /stream/signals)
+            self.on_publish(self.snapshot, self.frame.iloc[-new:])
+
+    async def run(self, ticks: int | None = None) -> None:
+        """Bucle: refresco inmediato y después uno por cierre de barra (+`delay` s)."""
+        while ticks is None or self.ticks < ticks:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                self.log.warning("scheduler_refresh_failed", extra={"error": str(e)})
+            self.ticks += 1
+            if ticks is not None and self.ticks >= ticks:
+                break
+            now = self.clock()
+            await self.sleep(max(0.0, next_bar_boundary(now, self.cfg["timeframe"]) + self.delay - now))
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
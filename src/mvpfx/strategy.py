@@ -12,8 +12,8 @@ if __package__ is None or __package__ == "":
 import pandas as pd
 import numpy as np
 from mvpfx.config import get_cfg
-from mvpfx.data import load_data
 from mvpfx.indicators import compute_all_indicators
+from mvpfx.instrument import timed
 
 def cross_up(a: pd.Series, b: pd.Series) -> pd.Series:
     return (a > b) & (a.shift(1) <= b.shift(1))
@@ -24,44 +24,133 @@ def cross_down(a: pd.Series, b: pd.Series) -> pd.Series:
 def regime_trending(df: pd.DataFrame, threshold: float) -> pd.Series:
     return (df["ema_fast"] - df["ema_slow"]).abs() / df["close"].abs() >= threshold
 
+def _prev(mask: np.ndarray) -> np.ndarray:
+    # Equivalente a `.shift(1)` de una comparación: la primera barra no tiene previa (False)
+    out = np.empty_like(mask)
+    out[:1] = False
+    out[1:] = mask[:-1]
+    return out
+
+def signal_arrays(close, ema_fast, ema_slow, macd, macd_signal, rsi, atr, cfg: dict, out: tuple | None = None,
+                  htf_trend=None):
+    """
+    Núcleo de `generate_signals` sobre arrays: devuelve (signal int8, score, sl, tp).
+
+    Con `out=(signal, score, sl, tp)` escribe en esos arrays (p.ej. el buffer de `mvpfx.features`)
+    en lugar de asignar nuevos. `htf_trend` (signo de la tendencia en un timeframe superior,
+    ver `mvpfx.resample.mtf_frame`) solo deja pasar largos con +1 y cortos con -1.
+    """
+    st, rk = cfg["strategy"], cfg["risk"]
+    close, atr = np.asarray(close), np.asarray(atr)
+    ef, es = np.asarray(ema_fast), np.asarray(ema_slow)
+    abs_close = np.abs(close)
+    filt_vol = atr / abs_close >= st["min_atr_pct"]
+    reg = np.abs(ef - es) / abs_close >= st["regime_threshold"]
+    long_cross = (ef > es) & _prev(ef <= es)
+    short_cross = (ef < es) & _prev(ef >= es)
+    if st["macd_confirm"]:
+        macd_ok_long = np.asarray(macd) >= np.asarray(macd_signal)
+        macd_ok_short = np.asarray(macd) <= np.asarray(macd_signal)
+    else:
+        macd_ok_long = macd_ok_short = np.ones(len(close), dtype=bool)
+    rsi_ok_long = np.asarray(rsi) >= st["rsi_long_min"]
+    rsi_ok_short = np.asarray(rsi) <= st["rsi_short_max"]
+    is_long = long_cross & rsi_ok_long & macd_ok_long & filt_vol & reg
+    is_short = short_cross & rsi_ok_short & macd_ok_short & filt_vol & reg & ~is_long
+    if htf_trend is not None:
+        htf_trend = np.asarray(htf_trend)
+        is_long &= htf_trend > 0
+        is_short &= htf_trend < 0
+    del abs_close
+
+    if out is None:
+        n = len(close)
+        out = (np.empty(n, dtype=np.int8), np.empty(n), np.empty(n), np.empty(n))
+    signal, score, sl, tp = out
+    signal[:] = 0
+    signal[is_long] = 1
+    signal[is_short] = -1
+    score[:] = 0.0
+    score[is_long] = ((long_cross.astype(np.int8) + rsi_ok_long + macd_ok_long + filt_vol + reg) / 5.0)[is_long]
+    score[is_short] = ((short_cross.astype(np.int8) + rsi_ok_short + macd_ok_short + filt_vol + reg) / 5.0)[is_short]
+    np.clip(score, 0, 1, out=score)
+    sl[:] = np.nan
+    tp[:] = np.nan
+    c, a = close[is_long], atr[is_long]
+    sl[is_long], tp[is_long] = c - rk["atr_sl_mult"]*a, c + rk["atr_tp_mult"]*a
+    c, a = close[is_short], atr[is_short]
+    sl[is_short], tp[is_short] = c + rk["atr_sl_mult"]*a, c - rk["atr_tp_mult"]*a
+    return signal, score, sl, tp
+
+@timed("signals")
 def generate_signals(df: pd.DataFrame, cfg: dict | None = None) -> pd.DataFrame:
     if cfg is None:
         cfg = get_cfg()
-    st, rk = cfg["strategy"], cfg["risk"]
-    atr_pct = df["atr"] / df["close"].abs()
-    filt_vol = atr_pct >= st["min_atr_pct"]
-    reg = regime_trending(df, st["regime_threshold"])
-    long_cross = cross_up(df["ema_fast"], df["ema_slow"])
-    short_cross = cross_down(df["ema_fast"], df["ema_slow"])
-    macd_ok_long = df["macd"] >= df["macd_signal"] if st["macd_confirm"] else pd.Series(True, index=df.index)
-    macd_ok_short = df["macd"] <= df["macd_signal"] if st["macd_confirm"] else pd.Series(True, index=df.index)
-    rsi_ok_long = df["rsi"] >= st["rsi_long_min"]
-    rsi_ok_short = df["rsi"] <= st["rsi_short_max"]
-    cond_long = long_cross & rsi_ok_long & macd_ok_long & filt_vol & reg
-    cond_short = short_cross & rsi_ok_short & macd_ok_short & filt_vol & reg
-
-    signal = pd.Series(0, index=df.index, dtype=int).mask(cond_long, 1).mask(cond_short, -1)
-    long_score = (long_cross.astype(int)+rsi_ok_long.astype(int)+macd_ok_long.astype(int)+filt_vol.astype(int)+reg.astype(int))/5.0
-    short_score = (short_cross.astype(int)+rsi_ok_short.astype(int)+macd_ok_short.astype(int)+filt_vol.astype(int)+reg.astype(int))/5.0
-    score = pd.Series(0.0, index=df.index).mask(signal==1, long_score).mask(signal==-1, short_score)
-
-    sl_long = df["close"] - cfg["risk"]["atr_sl_mult"]*df["atr"]
-    tp_long = df["close"] + cfg["risk"]["atr_tp_mult"]*df["atr"]
-    sl_short = df["close"] + cfg["risk"]["atr_sl_mult"]*df["atr"]
-    tp_short = df["close"] - cfg["risk"]["atr_tp_mult"]*df["atr"]
-    sl = pd.Series(np.nan, index=df.index).mask(signal==1, sl_long).mask(signal==-1, sl_short)
-    tp = pd.Series(np.nan, index=df.index).mask(signal==1, tp_long).mask(signal==-1, tp_short)
-
+    signal, score, sl, tp = signal_arrays(df["close"], df["ema_fast"], df["ema_slow"], df["macd"],
+                                          df["macd_signal"], df["rsi"], df["atr"], cfg,
+                                          htf_trend=df["htf_trend"] if "htf_trend" in df else None)
     out = df.copy()
-    out["signal"] = signal
-    out["score"] = score.clip(0,1).fillna(0.0)
+    out["signal"] = signal.astype(int)
+    out["score"] = score
     out["sl"], out["tp"] = sl, tp
     return out
 
+class SignalEngine:
+    """
+    Versión incremental de `generate_signals` para una barra nueva.
+
+    `update(row)` recibe close + indicadores de la barra (p.ej. la salida de
+    `IndicatorState.update` unida a la barra) y devuelve signal, score, sl y tp.
+    Solo guarda la relación EMA rápida/lenta previa para detectar cruces.
+    """
+
+    def __init__(self, cfg: dict | None = None):
+        if cfg is None:
+            cfg = get_cfg()
+        self.st, self.rk = cfg["strategy"], cfg["risk"]
+        self.prev_fast = np.nan
+        self.prev_slow = np.nan
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, cfg: dict | None = None) -> "SignalEngine":
+        eng = cls(cfg)
+        if len(df) > 0:
+            eng.prev_fast, eng.prev_slow = float(df["ema_fast"].iloc[-1]), float(df["ema_slow"].iloc[-1])
+        return eng
+
+    def update(self, row) -> dict:
+        st, rk = self.st, self.rk
+        c, ef, es, a = float(row["close"]), float(row["ema_fast"]), float(row["ema_slow"]), float(row["atr"])
+        pf, ps = self.prev_fast, self.prev_slow
+        self.prev_fast, self.prev_slow = ef, es
+        filt_vol = a / abs(c) >= st["min_atr_pct"]
+        reg = abs(ef - es) / abs(c) >= st["regime_threshold"]
+        long_cross = ef > es and pf <= ps
+        short_cross = ef < es and pf >= ps
+        m, ms = float(row["macd"]), float(row["macd_signal"])
+        macd_ok_long = m >= ms if st["macd_confirm"] else True
+        macd_ok_short = m <= ms if st["macd_confirm"] else True
+        rsi_ok_long = row["rsi"] >= st["rsi_long_min"]
+        rsi_ok_short = row["rsi"] <= st["rsi_short_max"]
+        htf = row.get("htf_trend") if hasattr(row, "get") else None
+        if htf is not None:
+            long_cross, short_cross = long_cross and htf > 0, short_cross and htf < 0
+        if long_cross and rsi_ok_long and macd_ok_long and filt_vol and reg:
+            sig = 1
+            score = (int(long_cross)+int(rsi_ok_long)+int(macd_ok_long)+int(filt_vol)+int(reg))/5.0
+            sl, tp = c - rk["atr_sl_mult"]*a, c + rk["atr_tp_mult"]*a
+        elif short_cross and rsi_ok_short and macd_ok_short and filt_vol and reg:
+            sig = -1
+            score = (int(short_cross)+int(rsi_ok_short)+int(macd_ok_short)+int(filt_vol)+int(reg))/5.0
+            sl, tp = c + rk["atr_sl_mult"]*a, c - rk["atr_tp_mult"]*a
+        else:
+            sig, score, sl, tp = 0, 0.0, np.nan, np.nan
+        return {"signal": sig, "score": min(max(score, 0.0), 1.0), "sl": sl, "tp": tp}
+
 if __name__ == "__main__":
-    from mvpfx.indicators import compute_all_indicators
+    from mvpfx.data import load_data
     cfg = get_cfg()
-    base = load_data()
+    base = load_data(cfg)
     feats = compute_all_indicators(base, cfg)
     sigs = generate_signals(feats, cfg)
     print(sigs[["close","signal","score","sl","tp"]].tail(10))
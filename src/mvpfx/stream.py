@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable
+
+RESYNC = "resync"
+
+def format_sse(event: str, data: bytes) -> bytes:
+    # `data` es JSON en una sola línea (orjson/json compacto no emite saltos de línea)
+    return b"event: " + event.encode("ascii") + b"\ndata: " + data + b"\n\n"
+
+class Subscriber:
+    __slots__ = ("queue", "resyncs")
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.resyncs = 0
+
+class Broadcaster:
+    """
+    Un productor, N clientes: cada suscriptor tiene una cola acotada.
+
+    Si un cliente lento llena su cola, se descartan sus eventos pendientes y se le
+    encola un `resync` (recibirá el snapshot completo): la memoria por cliente está
+    acotada y el productor nunca espera a nadie.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self.subscribers: set[Subscriber] = set()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.published = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.maxsize)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.discard(sub)
+
+    def publish(self, event: str, data: bytes) -> None:
+        """Difunde desde el hilo del event loop."""
+        self.published += 1
+        for sub in list(self.subscribers):
+            if sub.queue.full():
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.resyncs += 1
+                sub.queue.put_nowait((RESYNC, b""))
+            else:
+                sub.queue.put_nowait((event, data))
+
+    def publish_threadsafe(self, event: str, data: bytes) -> None:
+        """Difunde desde cualquier hilo (p.ej. el refresco del scheduler en un worker)."""
+        if self.loop is None:
+            self.publish(event, data)
+        else:
+            self.loop.call_soon_threadsafe(self.publish, event, data)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self.subscribers), "published": self.published,
+                "resyncs": sum(s.resyncs for s in self.subscribers)}
+
+async def sse_events(broadcaster: Broadcaster, snapshot: Callable[[], Awaitable[bytes]],
+                     heartbeat: float = 15.0) -> AsyncIterator[bytes]:
+    """
+    Flujo SSE de un cliente: `snapshot` inicial y después los eventos difundidos.
+
+    Se suscribe antes de pedir el snapshot para no perder barras publicadas entre medias
+    (como mucho llega repetida alguna, que el cliente fusiona por timestamp).
+    """
+    sub = broadcaster.subscribe()
+    try:
+        yield format_sse("snapshot", await snapshot())
+        while True:
+            try:
+                event, data = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if event == RESYNC:
+                yield format_sse("snapshot", await snapshot())
+            else:
+                yield format_sse(event, data)
+    finally:
+        broadcaster.unsubscribe(sub)
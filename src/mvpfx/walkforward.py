@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+# --- Bootstrap ---
+import os, sys
+if __package__ is None or __package__ == "":
+    _CUR = os.path.dirname(os.path.abspath(__file__))
+    _SRC = os.path.dirname(_CUR)
+    if _SRC not in sys.path:
+        sys.path.insert(0, _SRC)
+# ---------------
+
+import copy
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from mvpfx.config import get_cfg
+from mvpfx.data import load_data
+from mvpfx.optimize import SharedFrame, param_grid, parse_grid, shared_columns, evaluate
+
+def make_folds(n: int, train: int, test: int, step: int | None = None, start: int = 0,
+               anchored: bool = False) -> list[tuple[int, int, int, int]]:
+    """
+    Ventanas (train_start, train_end, test_start, test_end), extremos finales exclusivos.
+
+    La ventana de test sigue a la de train y se avanza `step` barras (por defecto `test`).
+    Con `anchored=True` el train empieza siempre en `start` y va creciendo.
+    """
+    step = step or test
+    folds, lo = [], start
+    while lo + train + test <= n:
+        tr0 = start if anchored else lo
+        folds.append((tr0, lo + train, lo + train, lo + train + test))
+        lo += step
+    return folds
+
+def fold_slice(df: pd.DataFrame, lo: int, hi: int, pad: int) -> tuple[pd.DataFrame, int]:
+    """Tramo [lo, hi) con hasta `pad` barras previas (la primera barra necesita la anterior para los cruces)."""
+    p0 = max(0, lo - pad)
+    return df.iloc[p0:hi], lo - p0
+
+def evaluate_window(df: pd.DataFrame, cfg: dict, params: dict, lo: int, hi: int) -> dict:
+    """
+    `evaluate` sobre [lo, hi) con los indicadores de `shared_columns` (histórico completo) recortados:
+    equivale a `backtest_signals` sobre esa ventana del frame de señales completo.
+    """
+    part, warm = fold_slice(df, lo, hi, 1)
+    c = copy.deepcopy(cfg)
+    c["warmup_bars"] = warm
+    return evaluate(part, c, params)
+
+def run_fold(df: pd.DataFrame, cfg: dict, combos: list[dict], fold: tuple[int, int, int, int],
+             sort_by: str = "Sharpe") -> dict:
+    tr0, tr1, te0, te1 = fold
+    train = [evaluate_window(df, cfg, p, tr0, tr1) for p in combos]
+    # Mejor combinación en train (NaN al final, primera en caso de empate)
+    best = max(range(len(train)), key=lambda i: (train[i][sort_by] == train[i][sort_by], train[i][sort_by]))
+    params = combos[best]
+    test = evaluate_window(df, cfg, params, te0, te1)
+    ix = df.index
+    row = {"train_start": ix[tr0], "train_end": ix[tr1 - 1], "test_start": ix[te0], "test_end": ix[te1 - 1], **params}
+    row[f"train_{sort_by}"] = train[best][sort_by]
+    row.update({f"test_{k}": test[k] for k in ("Sharpe", "Sortino", "CAGR", "MaxDrawdown", "Trades", "FinalEquity")})
+    return row
+
+# Estado por worker (se inicializa una vez por proceso)
+_W: dict = {}
+
+def _init_worker(spec, cfg: dict, combos: list[dict], sort_by: str) -> None:
+    shm, df = SharedFrame.attach(spec)
+    _W.update(shm=shm, df=df, cfg=cfg, combos=combos, sort_by=sort_by)
+
+def _fold_task(fold) -> dict:
+    return run_fold(_W["df"], _W["cfg"], _W["combos"], fold, _W["sort_by"])
+
+def run_walkforward(grid: dict[str, list], train: int, test: int, step: int | None = None,
+                    df: pd.DataFrame | None = None, cfg: dict | None = None, workers: int | None = None,
+                    sort_by: str = "Sharpe", anchored: bool = False) -> pd.DataFrame:
+    """
+    Walk-forward: en cada fold elige la mejor combinación del `grid` en train y la evalúa en test.
+
+    Los indicadores de todos los valores del grid (EMAs, MACD por par, ATR/RSI/BB) se calculan
+    una vez sobre todo el histórico, se publican en memoria compartida y cada fold los recorta.
+    Los folds se reparten entre procesos. Devuelve una fila por fold.
+    """
+    if cfg is None:
+        cfg = get_cfg()
+    if df is None:
+        df = load_data(cfg)
+    combos = param_grid(grid, cfg)
+    folds = make_folds(len(df), train, test, step, start=cfg["warmup_bars"], anchored=anchored)
+    if not combos or not folds:
+        return pd.DataFrame()
+    shared = SharedFrame(df.index, shared_columns(df, cfg, grid))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.spec, cfg, combos, sort_by)) as pool:
+            rows = list(pool.map(_fold_task, folds))
+    finally:
+        shared.close()
+    table = pd.DataFrame(rows)
+    table.index.name = "fold"
+    return table
+
+def summarize(table: pd.DataFrame, sort_by: str = "Sharpe") -> dict:
+    """Resumen fuera de muestra: medias de test, % de folds positivos y ratio test/train."""
+    if table.empty:
+        return {"Folds": 0}
+    train_mean = float(table[f"train_{sort_by}"].mean())
+    return {"Folds": int(len(table)),
+            "TestSharpeMean": float(table["test_Sharpe"].mean()),
+            "TestCAGRMean": float(table["test_CAGR"].mean()),
+            "TestWorstDrawdown": float(table["test_MaxDrawdown"].min()),
+            "PositiveFolds": float((table["test_CAGR"] > 0).mean()),
+            "Efficiency": float(table[f"test_{sort_by}"].mean() / train_mean) if train_mean else 0.0}
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="Evaluación walk-forward con folds en paralelo")
+    p.add_argument("--param", action="append", required=True,
+                   help="seccion.clave=valores, p.ej. indicators.ema_fast=3,5,8 o risk.atr_sl_mult=1.0:2.0:0.5")
+    p.add_argument("--train", type=int, required=True, help="Barras de la ventana de entrenamiento")
+    p.add_argument("--test", type=int, required=True, help="Barras de la ventana de test")
+    p.add_argument("--step", type=int, help="Avance entre folds (por defecto --test)")
+    p.add_argument("--anchored", action="store_true", help="Train anclado al inicio (ventana creciente)")
+    p.add_argument("--workers", type=int, help="Procesos (por defecto: núcleos disponibles)")
+    p.add_argument("--sort", default="Sharpe", help="Métrica para elegir parámetros en train")
+    p.add_argument("--out", default="walkforward_results.csv", help="CSV de salida con una fila por fold")
+    args = p.parse_args()
+    table = run_walkforward(parse_grid(args.param), args.train, args.test, args.step,
+                            workers=args.workers, sort_by=args.sort, anchored=args.anchored)
+    print(table.to_string())
+    print(summarize(table, args.sort))
+    table.to_csv(args.out)
+    print(f"Guardado en {args.out} ({len(table)} folds)")
@@ -0,0 +1,27 @@
+import copy
+import numpy as np
+import pytest
+from mvpfx.config import get_cfg
+from mvpfx.data import simulate_ohlcv
+
+def random_walk(bars: int, seed: int = 1):
+    # Paseo aleatorio sin clip (simulate_ohlcv se queda pegado a 1.01 y genera pocas operaciones)
+    df = simulate_ohlcv(bars, "M5", seed)
+    close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 0.2, bars))
+    df["open"] = np.r_[close[0], close[:-1]]; df["close"] = close
+    df["high"] = df[["open", "close"]].max(axis=1) + 0.05
+    df["low"] = df[["open", "close"]].min(axis=1) - 0.05
+    return df
+
+@pytest.fixture
+def walk():
+    """Fábrica `walk(bars, seed)` de barras M5 de paseo aleatorio."""
+    return random_walk
+
+@pytest.fixture
+def sim_cfg():
+    """Config propia del test con feed simulado M5 (300 barras, seed 7)."""
+    cfg = copy.deepcopy(get_cfg())
+    cfg["data"].update(source="simulated", bars=300, seed=7)
+    cfg["timeframe"] = "M5"
+    return cfg
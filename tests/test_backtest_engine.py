@@ -0,0 +1,55 @@
+import copy
+import numpy as np
+import pandas as pd
+from mvpfx.data import simulate_ohlcv
+from mvpfx.config import get_cfg
+from mvpfx.backtest import run_backtest, backtest_signals
+
+def _cfg(**risk):
+    cfg = copy.deepcopy(get_cfg())
+    cfg["risk"].update(risk)
+    return cfg
+
+def test_vectorized_matches_legacy():
+    for cfg in (_cfg(), _cfg(max_trades_per_day=10_000, daily_loss_limit=1.0)):
+        df = simulate_ohlcv(3000, cfg["timeframe"], cfg["data"]["seed"])
+        new = run_backtest(df, cfg, engine="vectorized", report_path=None)
+        old = run_backtest(df, cfg, engine="legacy", report_path=None)
+        pd.testing.assert_series_equal(new.equity_curve, old.equity_curve, check_freq=False, check_index_type=False)
+        pd.testing.assert_frame_equal(new.trades, old.trades)
+        assert new.metrics == old.metrics
+
+def _bars(rows, signal_at=0, side=1, sl=99.0, tp=102.0):
+    idx = pd.date_range("2024-01-01", periods=len(rows), freq="5min", tz="UTC")
+    df = pd.DataFrame(rows, columns=["open", "high", "low", "close"], index=idx)
+    df["atr"] = 1.0
+    df["signal"] = 0; df.iloc[signal_at, df.columns.get_loc("signal")] = side
+    df["sl"] = float("nan"); df["tp"] = float("nan")
+    df.iloc[signal_at, df.columns.get_loc("sl")] = sl
+    df.iloc[signal_at, df.columns.get_loc("tp")] = tp
+    return df
+
+def test_intrabar_fills():
+    cfg = _cfg(max_trades_per_day=10_000, daily_loss_limit=1.0)
+    cfg["execution"].update(simulate_spread=0.0, simulate_slippage=0.0)
+    exit_of = lambda df, **kw: backtest_signals(df, {**cfg, "execution": {**cfg["execution"], **kw}},
+                                                engine="intrabar").trades.iloc[-1]
+    # El low toca el SL aunque el cierre no (el motor por cierre no sale)
+    df = _bars([(100, 100, 100, 100), (100, 100.5, 98.5, 100), (100, 100, 100, 100)])
+    assert exit_of(df)[["price", "reason"]].tolist() == [99.0, "sl"]
+    assert backtest_signals(df, cfg, engine="vectorized").trades.iloc[-1]["type"] == "entry_long"
+    # SL y TP en la misma barra: decide la política
+    df = _bars([(100, 100, 100, 100), (101.8, 103, 98, 100)])
+    assert exit_of(df, same_bar_policy="sl_first")["reason"] == "sl"
+    assert exit_of(df, same_bar_policy="tp_first")["price"] == 102.0
+    assert exit_of(df, same_bar_policy="nearest_open")["reason"] == "tp"
+    # Gap por debajo del SL en un corto al revés: se ejecuta al open
+    df = _bars([(100, 100, 100, 100), (103, 103.5, 102.5, 103)], side=-1, sl=101.0, tp=98.0)
+    assert exit_of(df)[["price", "reason"]].tolist() == [103.0, "sl"]
+
+def test_intrabar_large_series(walk):
+    cfg = _cfg(max_trades_per_day=10_000, daily_loss_limit=1.0)
+    res = run_backtest(walk(50_000), cfg, engine="intrabar", report_path=None)
+    exits = res.trades[res.trades["type"] == "exit"]
+    assert set(exits["reason"]) == {"sl", "tp"}
+    assert np.isclose(res.equity_curve.iloc[-1], cfg["risk"]["capital"] + exits["pnl"].sum())
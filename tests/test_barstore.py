@@ -0,0 +1,21 @@
+import pandas as pd
+from mvpfx import data
+from mvpfx.data import simulate_ohlcv, load_data
+from mvpfx.barstore import csv_to_bar_store, open_bar_store, read_index
+
+def test_csv_to_bar_store_roundtrip(tmp_path, monkeypatch):
+    df = simulate_ohlcv(5000, "M1", 3)
+    csv = tmp_path / "bars.csv"
+    df.to_csv(csv, index_label="timestamp")
+    store = str(tmp_path / "store")
+    assert csv_to_bar_store(str(csv), store, chunksize=700) == 5000
+    assert read_index(store)["rows"] == 5000
+    start, end = df.index[1234], df.index[4321]
+    part = open_bar_store(store, start, end)
+    pd.testing.assert_frame_equal(part, df.loc[start:end].astype(float), check_freq=False, check_index_type=False)
+    # load_data con source=barstore
+    cfg = {**data.get_cfg(), "data": {"source": "barstore", "store_path": store,
+                                      "start": "2024-01-02", "end": None}}
+    monkeypatch.setattr(data, "get_cfg", lambda: cfg)
+    out = load_data()
+    assert out.index[0] == pd.Timestamp("2024-01-02", tz="UTC") and out.index[-1] == df.index[-1]
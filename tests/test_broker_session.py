@@ -0,0 +1,72 @@
+import threading
+import pytest
+from types import SimpleNamespace
+from mvpfx.broker_ib import IBSession
+
+class FakeIB:
+    """IB mínimo: cada waitOnUpdate entrega el siguiente estado de la orden."""
+    fail_connects = 0
+    def __init__(self):
+        self.connected = False
+        self.qualified = 0
+        self.waits = 0
+        self._trades = []
+        self.threads = set()
+    def connect(self, host, port, clientId, readonly, timeout):
+        if FakeIB.fail_connects:
+            FakeIB.fail_connects -= 1
+            raise ConnectionRefusedError
+        self.connected = True
+    def isConnected(self):
+        return self.connected
+    def disconnect(self):
+        self.connected = False
+    def qualifyContracts(self, *cs):
+        self.qualified += 1
+    def placeOrder(self, contract, order):
+        self.threads.add(threading.get_ident())
+        order.orderId = len(self._trades) + 1
+        t = SimpleNamespace(order=order, orderStatus=SimpleNamespace(status="PendingSubmit"),
+                            pending=["PreSubmitted", "Submitted"])
+        self._trades.append(t)
+        return t
+    def cancelOrder(self, order):
+        t = next(t for t in self._trades if t.order is order)
+        t.pending = ["PendingCancel", "Cancelled"]
+    def trades(self):
+        return self._trades
+    def waitOnUpdate(self, timeout=0):
+        self.waits += 1
+        for t in self._trades:
+            if t.pending:
+                t.orderStatus.status = t.pending.pop(0)
+        return True
+
+def test_session_reuses_connection_and_contracts():
+    sleeps = []
+    FakeIB.fail_connects = 2
+    s = IBSession(readonly=False, ib_factory=FakeIB, sleep=sleeps.append, backoff=0.1)
+    r1 = s.place_order("EURUSD", "long", 1000)
+    r2 = s.place_order("EUR.USD", "short", 1000, order_type="LMT", limit_price=1.1)
+    assert sleeps == [0.1, 0.2] and s.connects == 1
+    assert s.ib.qualified == 1 and len(s.contracts) == 1
+    # Vuelve con el primer ack, sin esperar a más eventos
+    assert r1 == {"orderId": 1, "status": "PreSubmitted"} and r2["orderId"] == 2 and s.ib.waits == 2
+    assert s.cancel_order(1)["status"] == "Cancelled"
+    s.ib.disconnect()
+    s.place_order("EURUSD", "long", 1000)
+    assert s.connects == 2 and s.ib.qualified == 0
+
+def test_session_calls_run_on_its_own_thread():
+    s = IBSession(ib_factory=FakeIB)
+    # Solo lectura por defecto: no se pueden enviar órdenes
+    assert s.readonly
+    with pytest.raises(RuntimeError):
+        s.place_order("EURUSD", "long", 1000)
+    s = IBSession(readonly=False, ib_factory=FakeIB)
+    workers = [threading.Thread(target=s.place_order, args=("EURUSD", "long", 1000)) for _ in range(6)]
+    for t in workers: t.start()
+    for t in workers: t.join()
+    # Todas las llamadas al IB pasan por el hilo (y el event loop) de la sesión
+    assert len(s.ib._trades) == 6 and s.ib.threads == {s._thread_id} != {threading.get_ident()}
+    assert s.connects == 1
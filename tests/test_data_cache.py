@@ -0,0 +1,52 @@
+import pandas as pd
+from mvpfx import data
+from mvpfx.data import BarCache, simulate_ohlcv
+
+def test_bar_cache_fetches_only_new_bars(tmp_path):
+    full = simulate_ohlcv(300, "M5", 1)
+    calls = []
+    def fetch(since):
+        calls.append(since)
+        upto = 200 if since is None else 300
+        chunk = full.iloc[:upto]
+        return chunk if since is None else chunk[chunk.index >= since - pd.Timedelta(minutes=10)]
+    cache = BarCache(str(tmp_path))
+    first = cache.get("fake", "EURUSD", "M5", fetch)
+    assert len(first) == 200 and calls == [None]
+    second = cache.get("fake", "EURUSD", "M5", fetch, bars=250)
+    assert calls[1] == full.index[199]
+    pd.testing.assert_frame_equal(second, full.iloc[50:].astype(float), check_freq=False, check_index_type=False)
+    # Persistido en disco, recortado a las últimas `bars`
+    pd.testing.assert_frame_equal(cache.load("fake", "EURUSD", "M5"), full.iloc[50:].astype(float), check_freq=False, check_index_type=False)
+
+def test_fetch_yfinance_cached_requests_gap_only(tmp_path, monkeypatch):
+    full = simulate_ohlcv(500, "M5", 2)
+    now = full.index[-1]
+    requested = []
+    def fake_fetch(symbol, timeframe, bars=3000, timeout=10):
+        requested.append(bars)
+        return full[full.index <= now - pd.Timedelta(minutes=50)].tail(bars) if len(requested) == 1 else full.tail(bars)
+    monkeypatch.setattr(data, "fetch_yfinance", fake_fetch)
+    monkeypatch.setattr(data.pd.Timestamp, "now", classmethod(lambda cls, tz=None: now))
+    cache = BarCache(str(tmp_path))
+    data.fetch_yfinance_cached("EURUSD", "M5", 300, cache)
+    df = data.fetch_yfinance_cached("EURUSD", "M5", 300, cache)
+    assert requested == [300, 11]
+    assert len(df) == 300 and df.index[-1] == now
+
+def test_fetch_yfinance_cached_refetches_window_across_large_gap(tmp_path, monkeypatch):
+    full = simulate_ohlcv(1000, "M5", 3)
+    now = full.index[-1]
+    requested = []
+    def fake_fetch(symbol, timeframe, bars=3000, timeout=10):
+        requested.append(bars)
+        return full.iloc[:300].tail(bars) if len(requested) == 1 else full.tail(bars)
+    monkeypatch.setattr(data, "fetch_yfinance", fake_fetch)
+    monkeypatch.setattr(data.pd.Timestamp, "now", classmethod(lambda cls, tz=None: now))
+    cache = BarCache(str(tmp_path))
+    data.fetch_yfinance_cached("EURUSD", "M5", 200, cache)
+    # 700 barras de hueco > 200: ventana completa, sin fusionar con la caché antigua
+    df = data.fetch_yfinance_cached("EURUSD", "M5", 200, cache)
+    assert requested == [200, 200]
+    pd.testing.assert_frame_equal(df, full.tail(200), check_dtype=False, check_freq=False, check_index_type=False)
+    assert len(cache.load("yfinance", "EURUSD", "M5")) == 200
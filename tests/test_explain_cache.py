@@ -0,0 +1,38 @@
+from mvpfx import llm_stub
+from mvpfx.explain_cache import ExplanationCache
+
+ITEM = dict(strategy="EMA", signal="long", indicators={"rsi": 61.23456, "macd": 0.000412345},
+            risk={"risk_pct": 0.0075}, confidence=0.82)
+
+class CountingModel:
+    model_name = "fake"
+    def __init__(self):
+        self.calls = 0
+    def generate_content(self, prompt):
+        self.calls += 1
+        return type("R", (), {"text": f"explicación {self.calls}"})()
+
+def test_repeat_explanation_hits_cache(tmp_path, monkeypatch):
+    llm = CountingModel()
+    monkeypatch.setattr(llm_stub, "model", llm)
+    cache = ExplanationCache(str(tmp_path / "exp.sqlite"))
+    a = llm_stub.explain_trade(**ITEM, cache=cache)
+    # Mismas entradas salvo ruido por debajo de 4 cifras significativas
+    b = llm_stub.explain_trade(**dict(ITEM, indicators={"rsi": 61.23461, "macd": 0.000412349}), cache=cache)
+    assert a["text"] == b["text"] and llm.calls == 1
+    llm_stub.explain_trade(**dict(ITEM, signal="short"), cache=cache)
+    assert llm.calls == 2
+    # Persistente: una caché nueva sobre el mismo fichero no vuelve a llamar
+    again = ExplanationCache(str(tmp_path / "exp.sqlite"))
+    assert llm_stub.explain_trade(**ITEM, cache=again)["text"] == a["text"] and llm.calls == 2
+    assert cache.stats()["hits"] == 1 and again.stats()["hit_rate"] == 1.0
+
+def test_ttl_and_max_entries(tmp_path):
+    now = [0.0]
+    cache = ExplanationCache(str(tmp_path / "exp.sqlite"), max_entries=2, ttl=10, clock=lambda: now[0])
+    for i, k in enumerate("abc"):
+        now[0] = i
+        cache.put(k, {"text": k})
+    assert len(cache) == 2 and cache.get("c") == {"text": "c"}
+    now[0] = 20
+    assert cache.get("c") is None and cache.stats()["misses"] == 1
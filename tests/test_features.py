@@ -0,0 +1,33 @@
+import tracemalloc
+import pandas as pd
+from mvpfx.config import get_cfg
+from mvpfx.data import simulate_ohlcv
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.strategy import generate_signals
+from mvpfx.features import compute_features
+from mvpfx.backtest import backtest_signals
+
+def test_compact_matches_dataframe_pipeline(walk):
+    cfg = get_cfg()
+    raw = walk(20_000, 3)
+    ref = generate_signals(compute_all_indicators(raw, cfg), cfg)
+    ff = compute_features(raw, cfg, "float64")
+    pd.testing.assert_frame_equal(ff.to_frame(), ref, check_exact=True)
+    w = cfg["warmup_bars"]
+    a, b = backtest_signals(ff.window(w), cfg), backtest_signals(ref.iloc[w:], cfg)
+    pd.testing.assert_series_equal(a.equity_curve, b.equity_curve, check_exact=True)
+    assert (compute_features(raw, cfg, "float32").signal == ff.signal).mean() > 0.999
+
+def _peak(fn) -> int:
+    tracemalloc.start()
+    res = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def test_compact_float32_halves_peak_memory():
+    cfg = get_cfg()
+    raw = simulate_ohlcv(200_000, cfg["timeframe"], 1)
+    full = _peak(lambda: generate_signals(compute_all_indicators(raw, cfg), cfg))
+    compact = _peak(lambda: compute_features(raw, cfg, "float32"))
+    assert compact < 0.5 * full
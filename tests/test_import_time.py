@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+HEAVY = ("google.generativeai", "ib_insync", "yfinance", "uvicorn")
+# Presupuesto holgado (el import de mvpfx.api ronda 0.8 s; con el SDK de Gemini superaba 1.7 s)
+BUDGET_S = {"mvpfx.api": 1.5, "mvpfx.backtest": 1.0, "mvpfx.broker_ib": 1.0}
+
+def _importtime(module: str) -> dict[str, int]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         env=env, capture_output=True, text=True, check=True).stderr
+    out = {}
+    for line in err.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cum, name = line.split("|")
+            out[name.strip()] = int(cum)
+    return out
+
+def test_import_budget_and_lazy_deps():
+    for module, budget in BUDGET_S.items():
+        times = _importtime(module)
+        assert not [m for m in times if m.startswith(HEAVY)], module
+        assert times[module] / 1e6 < budget, (module, times[module])
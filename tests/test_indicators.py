@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
 from mvpfx.data import simulate_ohlcv
-from mvpfx.indicators import compute_all_indicators
+from mvpfx.indicators import compute_all_indicators, IndicatorState
 from mvpfx.config import get_cfg
 
 def test_indicators_shapes():
@@ -10,3 +11,18 @@ def test_indicators_shapes():
     for col in ["ema_fast","ema_slow","rsi","macd","macd_signal","macd_hist","atr","bb_mid","bb_upper","bb_lower"]:
         assert col in out.columns
     assert out["rsi"].notna().sum() > 0
+
+def test_indicator_state_matches_batch():
+    cfg = get_cfg()
+    df = simulate_ohlcv(600, cfg["timeframe"], 3)
+    batch = compute_all_indicators(df, cfg)
+    cols = ["ema_fast", "ema_slow", "rsi", "macd", "macd_signal", "macd_hist", "atr", "bb_mid", "tick_volume"]
+    bb = ["bb_upper", "bb_lower"]
+    # Desde cero y sembrado con la primera mitad del histórico
+    for seed in (0, 300):
+        st = IndicatorState.from_history(df.iloc[:seed], cfg)
+        rows = [st.update(bar) for _, bar in df.iloc[seed:].iterrows()]
+        got = pd.DataFrame(rows, index=df.index[seed:])
+        pd.testing.assert_frame_equal(got[cols], batch[cols].iloc[seed:], check_exact=True, check_freq=False)
+        # std de pandas: reajuste interno no documentado tras rachas de cierres idénticos (ver _RollingMeanStd)
+        np.testing.assert_allclose(got[bb], batch[bb].iloc[seed:], rtol=0, atol=1e-7)
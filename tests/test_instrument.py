@@ -0,0 +1,38 @@
+import pstats
+from fastapi.testclient import TestClient
+from mvpfx import instrument, api
+from mvpfx.config import get_cfg
+from mvpfx.data import simulate_ohlcv
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.strategy import generate_signals
+
+def test_spans_collected_and_exposed():
+    cfg = get_cfg()
+    df = simulate_ohlcv(500, "M5", 1)
+    instrument.reset()
+    instrument.enable(False)
+    generate_signals(compute_all_indicators(df, cfg), cfg)
+    assert instrument.metrics() == {}
+    instrument.enable(True, log=False)
+    try:
+        for _ in range(3):
+            generate_signals(compute_all_indicators(df, cfg), cfg)
+        with instrument.span("custom") as sp:
+            sp.set(cache_hit=True)
+        body = TestClient(api.app).get("/metrics").json()
+    finally:
+        instrument.enable(False)
+    spans = body["spans"]
+    assert spans["indicators"]["count"] == 3 and spans["indicators"]["rows"] == 1500
+    assert spans["signals"]["p95_ms"] <= spans["signals"]["max_ms"]
+    assert spans["custom"]["cache_hits"] == 1 and sum(spans["custom"]["buckets"].values()) == 1
+
+def test_profile_dump(tmp_path):
+    cfg = get_cfg()
+    df = simulate_ohlcv(500, "M5", 1)
+    with instrument.profile("cprofile", str(tmp_path / "run.prof")):
+        compute_all_indicators(df, cfg)
+    assert pstats.Stats(str(tmp_path / "run.prof")).total_calls > 0
+    with instrument.profile("tracemalloc", str(tmp_path / "mem.txt")):
+        compute_all_indicators(df, cfg)
+    assert (tmp_path / "mem.txt").read_text().startswith("peak_mb")
@@ -0,0 +1,59 @@
+import asyncio
+import time
+import pytest
+from mvpfx import llm_stub
+from mvpfx.llm_stub import explain_trades, explain_trade_async
+
+ITEM = {"strategy": "EMA", "signal": "long", "indicators": {"rsi": 55.0},
+        "risk": {"risk_pct": 0.01}, "confidence": 0.8}
+
+@pytest.fixture(autouse=True)
+def _no_cache(monkeypatch):
+    monkeypatch.setattr(llm_stub, "get_cache", lambda: None)
+
+class _Resp:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    def __init__(self, delay=0.2, fail=0):
+        self.delay, self.fail = delay, fail
+        self.calls = self.inflight = self.peak = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.calls <= self.fail:
+                raise RuntimeError("503")
+            return _Resp(f"ok {self.calls}")
+        finally:
+            self.inflight -= 1
+
+def test_batch_concurrency_bounded_and_faster():
+    llm = FakeModel(delay=0.2)
+    items = [dict(ITEM, confidence=i / 10) for i in range(10)]
+    t0 = time.perf_counter()
+    out = explain_trades(items, max_concurrency=5, llm=llm)
+    elapsed = time.perf_counter() - t0
+    assert len(out) == 10 and llm.peak == 5
+    assert elapsed < 1.0  # secuencial serían ~2s
+    assert [o["json"]["confidence"] for o in out] == [i / 10 for i in range(10)]
+
+def test_retry_then_success():
+    llm = FakeModel(delay=0.0, fail=2)
+    out = asyncio.run(explain_trade_async(**ITEM, llm=llm, retries=2, backoff=0.0))
+    assert out["text"] == "ok 3" and llm.calls == 3
+
+def test_timeout_falls_back_to_error_text():
+    llm = FakeModel(delay=1.0)
+    out = asyncio.run(explain_trade_async(**ITEM, llm=llm, timeout=0.05, retries=1, backoff=0.0))
+    assert "Error LLM" in out["text"] and llm.calls == 2
+
+def test_sync_model_runs_in_thread():
+    class SyncModel:
+        def generate_content(self, prompt):
+            return _Resp("  sync  ")
+    assert explain_trades([ITEM], llm=SyncModel())[0]["text"] == "sync"
@@ -0,0 +1,31 @@
+import copy
+import numpy as np
+import pandas as pd
+from mvpfx.config import get_cfg
+from mvpfx.montecarlo import run_montecarlo, simulate_trades, trade_returns
+
+def _cfg():
+    cfg = copy.deepcopy(get_cfg())
+    cfg["risk"].update(capital=10000.0, daily_loss_limit=0.03)
+    return cfg
+
+def test_trade_returns_rebuild_observed_path():
+    t = pd.date_range("2024-01-01 10:00", periods=3, freq="13h", tz="UTC")
+    trades = pd.DataFrame({"time": t.repeat(2), "type": ["entry_long", "exit"] * 3,
+                           "pnl": [np.nan, 100.0, np.nan, -303.0, np.nan, 50.0]})
+    r, days = trade_returns(trades, 10000.0)
+    np.testing.assert_allclose(r, [0.01, -0.03, 50 / 9797])
+    assert days.tolist() == [0, 0, 1]
+    mc = run_montecarlo(trades, _cfg(), paths=2000, method="permute")
+    # Permutar no cambia la equity final; el drawdown depende del orden
+    np.testing.assert_allclose(mc.terminal_equity, 9847.0)
+    assert mc.max_drawdown.min() <= -0.03 + 1e-12
+
+def test_daily_limit_probability_and_chunking():
+    r = np.array([-0.02, -0.02, 0.01, 0.01])
+    days = np.array([0, 0, 1, 1])
+    # El límite del 3% solo se alcanza si las dos pérdidas caen el mismo día: 2 de 6 órdenes
+    mc = simulate_trades(r, days, _cfg(), paths=30000, method="permute", chunk_mb=0.01)
+    assert abs(mc.summary()["ProbDailyLimit"] - 1 / 3) < 0.02
+    boot = simulate_trades(r, days, _cfg(), paths=30000, method="bootstrap", chunk_mb=0.01)
+    assert len(boot.terminal_equity) == 30000 and 0 < boot.summary()["ProbLoss"] < 1
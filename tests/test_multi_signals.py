@@ -0,0 +1,44 @@
+import json
+import time
+from fastapi.testclient import TestClient
+from mvpfx import api
+from mvpfx.data import simulate_ohlcv
+
+def _fake_fetch(delays: dict):
+    def fetch(symbol, timeframe, bars):
+        d = delays.get(symbol, 0.2)
+        if d is None:
+            raise ValueError(f"sin datos para {symbol}")
+        time.sleep(d)
+        return simulate_ohlcv(bars, timeframe, seed=len(symbol))
+    return fetch
+
+def test_multi_symbol_concurrent_with_partial_failures(monkeypatch):
+    monkeypatch.setattr(api, "_fetch_bars", _fake_fetch({"BAD": None, "SLOW": 3.0}))
+    monkeypatch.setitem(api.cfg["api"], "signals_timeout", 0.5)
+    monkeypatch.setitem(api.cfg["api"], "scheduler", False)
+    api.signals_cache.clear()
+    symbols = ["S1", "S2", "S3", "S4", "S5", "S6", "BAD", "SLOW"]
+    with TestClient(api.app) as client:
+        pool = api.fetch_pool
+        t0 = time.perf_counter()
+        r = client.get("/signals", params={"symbols": ",".join(symbols), "format": "columnar"})
+        elapsed = time.perf_counter() - t0
+        # La descarga vencida sigue ocupando su hilo y se contabiliza
+        assert client.get("/signals/cache").json()["fetch"] == {"running": 1, "timeouts": 1}
+    # Los pools se cierran con la app
+    assert api.fetch_pool is None and pool._shutdown
+    body = r.json()
+    assert r.status_code == 200 and elapsed < 1.5  # en serie serían > 4 s
+    assert sorted(body["symbols"]) == ["S1", "S2", "S3", "S4", "S5", "S6"]
+    assert body["errors"] == {"BAD": "ValueError: sin datos para BAD", "SLOW": "TimeoutError"}
+    assert body["symbols"]["S1"] == json.loads(api.encode_signals(api.frame_from_bars(simulate_ohlcv(250, "M5", 2)), "columnar"))
+
+def test_batch_post_matches_get(monkeypatch):
+    monkeypatch.setattr(api, "_fetch_bars", _fake_fetch({}))
+    monkeypatch.setitem(api.cfg["api"], "scheduler", False)
+    api.signals_cache.clear()
+    with TestClient(api.app) as client:
+        post = client.post("/signals/batch", json={"symbols": ["AA", "BB"]}).json()
+        get = client.get("/signals", params={"symbols": "AA,BB"}).json()
+    assert post == get and set(post["symbols"]) == {"AA", "BB"} and post["errors"] == {}
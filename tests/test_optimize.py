@@ -0,0 +1,34 @@
+import copy
+import numpy as np
+from mvpfx.data import simulate_ohlcv
+from mvpfx.config import get_cfg
+from mvpfx.backtest import run_backtest
+from mvpfx.optimize import param_grid, parse_grid, run_sweep, set_param
+
+def test_parse_grid():
+    grid = parse_grid(["indicators.ema_fast=3,5", "risk.atr_sl_mult=1.0:2.0:0.5", "strategy.macd_confirm=true,false"])
+    assert grid == {"indicators.ema_fast": [3, 5], "risk.atr_sl_mult": [1.0, 1.5, 2.0],
+                    "strategy.macd_confirm": [True, False]}
+    # Solo se barre la rápida: se compara contra la lenta de cfg
+    cfg = copy.deepcopy(get_cfg())
+    cfg["indicators"]["ema_slow"] = 8
+    assert param_grid({"indicators.ema_fast": [3, 5, 8, 13]}, cfg) == [{"indicators.ema_fast": 3}, {"indicators.ema_fast": 5}]
+
+def test_sweep_matches_single_backtest(walk):
+    cfg = copy.deepcopy(get_cfg())
+    grid = {"indicators.ema_fast": [3, 5], "indicators.ema_slow": [8, 13], "risk.atr_sl_mult": [1.0, 1.5]}
+    # simulate_ohlcv (clip en 1.01) produce empates de EMAs a nivel de ulp: el barrido debe resolverlos igual
+    # features.compact: evaluate y run_backtest pasan por FeatureFrame
+    for df, compact in ((simulate_ohlcv(1500, "M5", 42), False), (walk(1500), False), (walk(1500), True)):
+        cfg["features"]["compact"] = compact
+        table = run_sweep(grid, df, cfg, workers=2)
+        assert len(table) == 8
+        assert table["Sharpe"].is_monotonic_decreasing
+        for row in table.to_dict("records"):
+            c = copy.deepcopy(cfg)
+            for k in grid:
+                set_param(c, k, row[k])
+            ref = run_backtest(df, c, report_path=None)
+            assert row["Trades"] == (int((ref.trades["type"] == "exit").sum()) if len(ref.trades) else 0)
+            for k, v in ref.metrics.items():
+                np.testing.assert_equal(row[k], v)
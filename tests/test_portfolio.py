@@ -0,0 +1,50 @@
+import copy
+import numpy as np
+import pandas as pd
+from mvpfx.config import get_cfg
+from mvpfx.data import simulate_ohlcv
+from mvpfx.backtest import prepare_backtest_frame, backtest_signals
+from mvpfx.portfolio import run_portfolio
+
+def _cfg():
+    cfg = copy.deepcopy(get_cfg())
+    cfg["risk"]["max_trades_per_day"] = 10**6
+    cfg["risk"]["daily_loss_limit"] = 10.0
+    return cfg
+
+def test_single_symbol_matches_backtest(walk):
+    cfg = _cfg()
+    df = walk(3000, seed=3)
+    res = run_portfolio(["X"], cfg, frames={"X": df}, report_path=None)
+    ref = backtest_signals(prepare_backtest_frame(df, cfg), cfg)
+    np.testing.assert_allclose(res.equity_curve.to_numpy(), ref.equity_curve.to_numpy())
+    assert res.per_symbol["X"]["Trades"] == int((ref.trades["type"] == "exit").sum())
+
+def test_union_timeline_and_shared_equity(walk):
+    cfg = _cfg()
+    a, b = walk(2000, seed=1), walk(1500, seed=2).iloc[::2]
+    res = run_portfolio(["A", "B"], cfg, frames={"A": a, "B": b}, workers=2, report_path=None)
+    assert res.equity_curve.index.is_monotonic_increasing
+    assert len(res.equity_curve) == len(a.index[cfg["warmup_bars"]:].union(b.index[cfg["warmup_bars"]:]))
+    pnl = sum(m["PnL"] for m in res.per_symbol.values())
+    assert np.isclose(res.equity_curve.iloc[-1], cfg["risk"]["capital"] + pnl)
+    assert set(res.trades["symbol"]) <= {"A", "B"}
+
+def test_intrabar_engine_from_cfg(walk):
+    cfg = _cfg()
+    cfg["execution"]["engine"] = "intrabar"
+    df = walk(3000, seed=4)
+    res = run_portfolio(["X"], cfg, frames={"X": df}, report_path=None)
+    ref = backtest_signals(prepare_backtest_frame(df, cfg), cfg)
+    assert "reason" in ref.trades and len(ref.trades) > 0
+    np.testing.assert_allclose(res.equity_curve.to_numpy(), ref.equity_curve.to_numpy())
+    assert res.trades.drop(columns="symbol").equals(ref.trades)
+
+def test_compact_features_match_dataframe(walk):
+    cfg = _cfg()
+    a, b = walk(2000, seed=1), walk(1500, seed=2)
+    ref = run_portfolio(["A", "B"], cfg, frames={"A": a, "B": b}, workers=2, report_path=None)
+    cfg["features"]["compact"] = True
+    res = run_portfolio(["A", "B"], cfg, frames={"A": a, "B": b}, workers=2, report_path=None)
+    pd.testing.assert_series_equal(res.equity_curve, ref.equity_curve)
+    assert res.per_symbol == ref.per_symbol and len(ref.trades) > 0
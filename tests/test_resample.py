@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from mvpfx.config import get_cfg
+from mvpfx.data import load_data, simulate_ohlcv
+from mvpfx.resample import Resampler, align_to, mtf_frame, resample_ohlcv
+from mvpfx.strategy import generate_signals
+
+def _m1_with_gaps():
+    m1 = simulate_ohlcv(3000, "M1", 4)
+    return m1.drop(m1.index[[7, 8, 59, 600, 1799]])
+
+def test_resample_matches_pandas_and_incremental():
+    m1 = _m1_with_gaps()
+    for tf, rule in (("M5", "5min"), ("M15", "15min"), ("H1", "1h")):
+        out = resample_ohlcv(m1, tf)
+        ref = m1.resample(rule).agg({"open": "first", "high": "max", "low": "min",
+                                     "close": "last", "volume": "sum"}).dropna(subset=["open"])
+        pd.testing.assert_frame_equal(out, ref, check_freq=False)
+        rs, bars = Resampler(tf), []
+        for ts, bar in zip(m1.index, m1.to_dict("records")):
+            bars += rs.update(ts, bar)
+        inc = pd.DataFrame([b for _, b in bars], index=pd.DatetimeIndex([t for t, _ in bars]).as_unit(m1.index.unit))
+        pd.testing.assert_frame_equal(inc, out, check_names=False)
+
+def test_align_without_lookahead():
+    m1 = simulate_ohlcv(600, "M1", 2)
+    h1 = resample_ohlcv(m1, "H1")
+    m5 = resample_ohlcv(m1, "M5")
+    al = align_to(m5.index, "M5", h1, "H1", ["close"])
+    t0 = m1.index[0]
+    # La barra M5 de xx:55 cierra a la vez que la H1 de xx:00; la de xx:50 aún ve la H1 anterior
+    assert al.loc[t0 + pd.Timedelta("1h55min"), "htf_close"] == h1.loc[t0 + pd.Timedelta("1h"), "close"]
+    assert al.loc[t0 + pd.Timedelta("1h50min"), "htf_close"] == h1.loc[t0, "close"]
+    assert al.iloc[:11]["htf_close"].isna().all()
+    cfg = get_cfg()
+    sig = generate_signals(mtf_frame(m1, cfg, "M5", "H1"), cfg)
+    trend = sig.loc[sig["signal"] != 0, "htf_trend"]
+    assert (np.sign(sig.loc[trend.index, "signal"]) == trend).all()
+
+def test_load_data_base_timeframe_counts_target_bars(sim_cfg):
+    sim_cfg["data"].update(bars=250, base_timeframe="M1")
+    df = load_data(sim_cfg)
+    assert len(df) == 250
+    pd.testing.assert_frame_equal(df, resample_ohlcv(simulate_ohlcv(1250, "M1", sim_cfg["data"]["seed"]), "M5"))
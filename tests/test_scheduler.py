@@ -0,0 +1,54 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from mvpfx import api
+from mvpfx.data import SimulatedFeed
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.strategy import generate_signals
+from mvpfx.scheduler import BarScheduler
+
+def test_scheduler_incremental_matches_batch(sim_cfg):
+    cfg = sim_cfg
+    now = [1_700_000_100.0]
+    clock = lambda: now[0]
+    async def sleep(dt):
+        now[0] += dt
+    feed = SimulatedFeed("M5", 300, 7, clock)
+    sched = BarScheduler(cfg, fetch=feed, encode=api.encode_signals, clock=clock, sleep=sleep)
+    asyncio.run(sched.run(ticks=6))
+    snap = sched.snapshot
+    # 300 barras iniciales + una por cada uno de los 5 cierres posteriores
+    assert snap.bar == feed.df.index[-1] and len(feed.df) == 305
+    assert len(snap.frame) == 250 - cfg["warmup_bars"]
+    batch = generate_signals(compute_all_indicators(feed.df, cfg), cfg).iloc[-len(snap.frame):]
+    for col in ("ema_fast", "ema_slow", "macd", "rsi", "atr"):
+        np.testing.assert_allclose(snap.frame[col], batch[col], rtol=1e-12)
+    np.testing.assert_array_equal(snap.frame["signal"].to_numpy(), batch["signal"].to_numpy())
+    assert snap.bodies["rows"] == api.encode_signals(snap.frame, "rows")
+
+def test_signals_served_from_snapshot(monkeypatch, sim_cfg):
+    sched = BarScheduler(sim_cfg, encode=api.encode_signals)
+    sched.refresh()
+    monkeypatch.setattr(api, "scheduler", sched)
+    monkeypatch.setattr(api, "signals_frame", lambda: (_ for _ in ()).throw(AssertionError("recalculado")))
+    r = TestClient(api.app).get("/signals", params={"format": "columnar"})
+    assert r.status_code == 200 and r.content == sched.snapshot.bodies["columnar"]
+
+def test_stale_snapshot_falls_back_to_live(monkeypatch, sim_cfg):
+    now = [pd.Timestamp("2024-01-03", tz="UTC").timestamp()]
+    fetch = SimulatedFeed("M5", 300, 7, lambda: now[0])
+    sched = BarScheduler(sim_cfg, fetch=fetch, encode=api.encode_signals, clock=lambda: now[0])
+    sched.refresh()
+    monkeypatch.setattr(api, "scheduler", sched)
+    live = api.frame_from_bars(fetch(None).iloc[:-1])
+    monkeypatch.setattr(api, "signals_frame", lambda: live)
+    monkeypatch.setitem(api.cfg["api"], "signals_cache", False)
+    client = TestClient(api.app)
+    assert client.get("/signals").content == sched.snapshot.bodies["rows"]
+    # Dos barras sin refrescar todavía vale; más ya no
+    now[0] += 2 * 300
+    assert client.get("/signals").content == sched.snapshot.bodies["rows"]
+    now[0] += 1
+    assert client.get("/signals").content == api.encode_signals(live, "rows")
+    assert client.get("/signals/cache").json()["snapshot"]["stale"]
@@ -1,5 +1,39 @@
-from mvpfx.api import OrderRequest
+import json
+import numpy as np
+from mvpfx import api
+from mvpfx.api import OrderRequest, Signal, encode_signals
+from mvpfx.config import get_cfg
+from mvpfx.data import simulate_ohlcv
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.strategy import generate_signals
 
 def test_order_request_model():
     req = OrderRequest(side="long", qty=10000, order_type="MKT")
     assert req.side == "long" and req.qty == 10000
+
+def _pydantic_rows(df):
+    return [Signal(timestamp=ts.isoformat(), open=float(r["open"]), high=float(r["high"]), low=float(r["low"]),
+                   close=float(r["close"]), price=float(r["close"]), signal=int(r["signal"]), score=float(r["score"]),
+                   sl=float(r["sl"]) if r["signal"] != 0 else None,
+                   tp=float(r["tp"]) if r["signal"] != 0 else None).model_dump()
+            for ts, r in df.iterrows()]
+
+def test_fast_signal_encoding_matches_pydantic():
+    cfg = get_cfg()
+    df = generate_signals(compute_all_indicators(simulate_ohlcv(600, "M5", 4), cfg), cfg)
+    ref = _pydantic_rows(df)
+    assert json.loads(encode_signals(df, "rows")) == ref
+    cols = json.loads(encode_signals(df, "columnar"))
+    assert [dict(zip(cols, vals)) for vals in zip(*cols.values())] == ref
+
+def test_json_fallback_matches_orjson(monkeypatch):
+    cfg = get_cfg()
+    df = generate_signals(compute_all_indicators(simulate_ohlcv(300, "M5", 4), cfg), cfg)
+    df.iloc[3, df.columns.get_loc("signal")] = 1
+    df.iloc[3, df.columns.get_loc("sl")] = np.nan
+    df.iloc[5, df.columns.get_loc("score")] = np.inf
+    fast = {fmt: api.encode_signals(df, fmt) for fmt in ("rows", "columnar")}
+    monkeypatch.setattr(api, "orjson", None)
+    for fmt, body in fast.items():
+        assert api.encode_signals(df, fmt) == body
+    assert b"NaN" not in fast["rows"] and b"Infinity" not in fast["rows"]
@@ -0,0 +1,55 @@
+import threading
+import time
+from fastapi.testclient import TestClient
+from mvpfx import api
+from mvpfx.data import simulate_ohlcv
+from mvpfx.response_cache import BarAlignedCache
+
+def test_cache_expires_at_bar_boundary():
+    base = 300.0 * 3333
+    now = [base + 20]  # 20 s dentro de una barra M5
+    cache = BarAlignedCache(clock=lambda: now[0])
+    calls = []
+    compute = lambda: calls.append(1) or b"x"
+    cache.get_or_compute("k", "M5", compute)
+    now[0] = base + 299
+    cache.get_or_compute("k", "M5", compute)
+    assert len(calls) == 1
+    now[0] = base + 300
+    cache.get_or_compute("k", "M5", compute)
+    assert len(calls) == 2 and cache.stats()["hits"] == 1
+
+def test_expired_entries_are_pruned():
+    now = [300.0 * 3333]
+    cache = BarAlignedCache(clock=lambda: now[0])
+    for i in range(5):
+        cache.get_or_compute(("cfg", i), "M5", lambda: b"x")
+    assert cache.stats()["entries"] == 5
+    now[0] += 300
+    cache.get_or_compute(("cfg", 99), "M5", lambda: b"y")
+    assert cache.stats()["entries"] == 1
+
+def test_concurrent_requests_coalesce():
+    cache = BarAlignedCache()
+    calls = []
+    def slow():
+        calls.append(1); time.sleep(0.2); return b"body"
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(cache.get_or_compute("k", "M5", slow))) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert out == [b"body"] * 8 and len(calls) == 1
+    assert cache.stats()["coalesced"] == 7
+
+def test_signals_endpoint_served_from_cache(monkeypatch):
+    calls = []
+    def fake_fetch(symbol, timeframe, bars):
+        calls.append(symbol); return simulate_ohlcv(bars, timeframe, 1)
+    monkeypatch.setattr(api, "_fetch_bars", fake_fetch)
+    api.signals_cache.clear()
+    c = TestClient(api.app)
+    r1, r2 = c.get("/signals"), c.get("/signals")
+    assert r1.status_code == 200 and r1.content == r2.content
+    assert len(r1.json()) == 250 - api.cfg["warmup_bars"]
+    assert len(calls) == 1
+    assert c.get("/signals/cache").json()["hits"] >= 1
@@ -1,7 +1,10 @@
+import copy
+import numpy as np
+import pandas as pd
 from mvpfx.data import simulate_ohlcv
 from mvpfx.indicators import compute_all_indicators
-from mvpfx.strategy import generate_signals
-from mvpfx.risk import position_size
+from mvpfx.strategy import generate_signals, SignalEngine
+from mvpfx.risk import position_size, DailyRiskLedger, enforce_daily_limits
 from mvpfx.config import get_cfg
 
 def test_strategy_and_sizing():
@@ -14,3 +17,35 @@ def test_strategy_and_sizing():
     assert sigs["signal"].abs().sum() >= 0
     units = position_size(cfg["risk"]["capital"], price=1.08, atr=0.001, cfg=cfg)
     assert units >= cfg["risk"]["min_position_units"]
+
+def test_daily_ledger_matches_enforce_daily_limits():
+    cfg = get_cfg()
+    rng = np.random.default_rng(0)
+    idx = pd.date_range("2024-01-01", periods=300, freq="37min", tz="UTC")
+    log = pd.DataFrame({"pnl": rng.normal(-20, 40, len(idx))}, index=idx)
+    ledger = DailyRiskLedger(cfg["risk"]["capital"], cfg)
+    for i, (ts, pnl) in enumerate(log["pnl"].items()):
+        ledger.record(ts, pnl)
+        assert ledger.limit_hit() == enforce_daily_limits(log.iloc[:i+1], cfg["risk"]["capital"], cfg)
+    # En vivo, un nuevo día UTC reinicia los contadores
+    assert not ledger.limit_hit(idx[-1] + pd.Timedelta(days=1))
+    assert ledger.trades == 0
+
+def test_signal_engine_matches_generate_signals():
+    rng = np.random.default_rng(0)
+    for seed in range(6):
+        cfg = copy.deepcopy(get_cfg())
+        cfg["indicators"].update(ema_fast=int(rng.integers(2, 10)), ema_slow=int(rng.integers(10, 30)))
+        cfg["strategy"].update(rsi_long_min=float(rng.uniform(0, 60)), rsi_short_max=float(rng.uniform(40, 100)),
+                               macd_confirm=bool(seed % 2), min_atr_pct=float(rng.uniform(0, 5e-4)),
+                               regime_threshold=float(rng.uniform(0, 2e-4)))
+        feats = compute_all_indicators(simulate_ohlcv(1000, cfg["timeframe"], seed), cfg)
+        batch = generate_signals(feats, cfg)
+        split = 400
+        eng = SignalEngine.from_history(feats.iloc[:split], cfg)
+        got = pd.DataFrame([eng.update(row) for _, row in feats.iloc[split:].iterrows()], index=feats.index[split:])
+        ref = batch.iloc[split:]
+        assert (got["signal"].to_numpy() == ref["signal"].to_numpy()).all()
+        np.testing.assert_array_equal(got["score"].to_numpy(), ref["score"].to_numpy())
+        np.testing.assert_array_equal(got["sl"].to_numpy(), ref["sl"].to_numpy())
+        np.testing.assert_array_equal(got["tp"].to_numpy(), ref["tp"].to_numpy())
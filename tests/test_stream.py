@@ -0,0 +1,48 @@
+import asyncio
+import json
+from mvpfx import api
+from mvpfx.data import SimulatedFeed
+from mvpfx.scheduler import BarScheduler
+from mvpfx.stream import Broadcaster, sse_events
+
+def _parse(chunk: bytes) -> tuple[str, list]:
+    event, data = chunk.decode().strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+def test_stream_snapshot_then_new_bars_to_all_clients(sim_cfg):
+    async def main():
+        now = [1_700_000_100.0]
+        feed = SimulatedFeed("M5", 300, 7, lambda: now[0])
+        b = Broadcaster()
+        sched = BarScheduler(sim_cfg, fetch=feed, encode=api.encode_signals, clock=lambda: now[0],
+                             on_publish=lambda snap, new: b.publish("bars", api.encode_signals(new, "rows")))
+        sched.refresh()
+        snapshot = lambda: asyncio.sleep(0, sched.snapshot.bodies["rows"])
+        clients = [sse_events(b, snapshot, heartbeat=5) for _ in range(3)]
+        firsts = [_parse(await anext(c)) for c in clients]
+        assert all(ev == "snapshot" and len(rows) == len(sched.frame) for ev, rows in firsts)
+        now[0] += 600
+        assert sched.refresh() == 2
+        for c in clients:
+            ev, rows = _parse(await anext(c))
+            assert ev == "bars" and [r["timestamp"] for r in rows] == [t.isoformat() for t in feed.df.index[-2:]]
+            await c.aclose()
+        assert b.stats()["subscribers"] == 0
+    asyncio.run(main())
+
+def test_slow_client_gets_resync_snapshot():
+    async def main():
+        b = Broadcaster(maxsize=2)
+        snapshot = lambda: asyncio.sleep(0, b'[{"n":0}]')
+        slow, fast = sse_events(b, snapshot, heartbeat=5), sse_events(b, snapshot, heartbeat=5)
+        await anext(slow); await anext(fast)
+        b.publish("bars", b'[{"n":1}]')
+        assert _parse(await anext(fast)) == ("bars", [{"n": 1}])
+        for n in range(2, 6):
+            b.publish("bars", b'[{"n":%d}]' % n)
+            assert _parse(await anext(fast)) == ("bars", [{"n": n}])
+        # La cola del lento se desbordó: un snapshot sustituye a los eventos descartados
+        assert _parse(await anext(slow)) == ("snapshot", [{"n": 0}])
+        assert b.stats()["resyncs"] == 2 and b.stats()["published"] == 5
+        await slow.aclose(); await fast.aclose()
+    asyncio.run(main())
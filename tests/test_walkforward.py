@@ -0,0 +1,35 @@
+import copy
+import numpy as np
+import pandas as pd
+from mvpfx.config import get_cfg
+from mvpfx.optimize import set_param
+from mvpfx.indicators import compute_all_indicators
+from mvpfx.strategy import generate_signals
+from mvpfx.backtest import backtest_signals
+from mvpfx.walkforward import make_folds, run_walkforward, summarize
+
+def test_make_folds():
+    assert make_folds(100, 40, 20, start=10) == [(10, 50, 50, 70), (30, 70, 70, 90)]
+    assert make_folds(100, 40, 20, start=10, anchored=True)[1] == (10, 70, 70, 90)
+
+def test_folds_match_full_history_backtest(walk):
+    cfg = copy.deepcopy(get_cfg())
+    df = walk(4000, seed=5)
+    grid = {"indicators.ema_fast": [3, 5], "indicators.ema_slow": [8, 13], "indicators.rsi_period": [9, 14]}
+    table = run_walkforward(grid, train=1500, test=500, df=df, cfg=cfg, workers=2)
+    compact = copy.deepcopy(cfg)
+    compact["features"]["compact"] = True
+    pd.testing.assert_frame_equal(run_walkforward(grid, train=1500, test=500, df=df, cfg=compact, workers=2), table)
+    folds = make_folds(len(df), 1500, 500, start=cfg["warmup_bars"])
+    assert len(table) == len(folds) and summarize(table)["Folds"] == len(folds)
+    for (_, _, te0, te1), row in zip(folds, table.to_dict("records")):
+        c = copy.deepcopy(cfg)
+        for k in grid:
+            set_param(c, k, row[k])
+        # Referencia: indicadores sobre todo el histórico y backtest solo en la ventana de test
+        sigs = generate_signals(compute_all_indicators(df, c), c).iloc[te0:te1]
+        ref = backtest_signals(sigs, c)
+        exits = int((ref.trades["type"] == "exit").sum()) if len(ref.trades) else 0
+        got = [row[f"test_{k}"] for k in ("Sharpe", "Sortino", "CAGR", "MaxDrawdown", "Trades", "FinalEquity")]
+        want = [ref.metrics[k] for k in ("Sharpe", "Sortino", "CAGR", "MaxDrawdown")] + [exits, ref.equity_curve.iloc[-1]]
+        np.testing.assert_array_equal(got, want)